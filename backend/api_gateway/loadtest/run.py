@@ -0,0 +1,281 @@
+"""Gateway load test: same traffic sent straight to a stub upstream and through main.py.
+
+Starts loadtest.upstream_stub and the gateway (uvicorn main:app, pointed at the stub via
+the *_SERVICE_URL env vars) as child processes. Then it sends the same mixed traffic at
+a fixed rate (open loop: requests go out on schedule whether or not earlier ones have
+finished), first directly to the stub and then through the gateway. The report shows:
+
+  * latency p50/p95/p99 for both runs and the difference, i.e. the gateway overhead;
+  * TCP connections the gateway opened to the upstream (distinct client ports seen
+    by the stub) and the peak number of open file descriptors in the gateway;
+  * gateway RSS when idle and at peak, and the growth per concurrent request.
+
+Linux only, because RSS and descriptors are read from /proc.
+
+    cd backend/api_gateway
+    python -m loadtest.run --rps 200 --duration 20 --latency-ms 20 --payload-bytes 2048
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (weight, method, gateway path, upstream path) — upstream path повторяет то, куда gateway проксирует
+TRAFFIC_MIX = [
+    (40, "GET", "/api/stocks/popular", "/stocks/popular"),
+    (15, "GET", "/api/news/", "/news/"),
+    (15, "GET", "/api/companies/", "/companies/"),
+    (10, "GET", "/api/auth/me", "/auth/me"),
+    (10, "GET", "/api/watchlist/", "/watchlist/"),
+    (5, "GET", "/api/portfolio/", "/portfolio/"),
+    (5, "POST", "/api/chat-gpt/", "/chat-gpt/"),
+]
+UPSTREAM_ENV = {
+    "AUTH_SERVICE_URL": "/auth",
+    "WATCHLIST_SERVICE_URL": "/watchlist",
+    "PORTFOLIO_SERVICE_URL": "/portfolio",
+    "STOCK_SERVICE_URL": "/stocks",
+    "NEWS_SERVICE_URL": "/news",
+    "LLM_SERVICE_URL": "/chat-gpt",
+    "COMPANY_SERVICE_URL": "/companies",
+}
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def read_proc(pid: int) -> tuple[int, int]:
+    """RSS in KiB and the number of open file descriptors."""
+    rss = 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+                break
+    return rss, len(os.listdir(f"/proc/{pid}/fd"))
+
+
+def start_process(args: list[str], env: dict | None = None) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, *args],
+        cwd=GATEWAY_DIR,
+        env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(url: str, timeout: float = 15):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not start in {timeout}s")
+
+
+class OpenLoopRun:
+    """Sends requests on a fixed schedule and collects latencies and in-flight counts."""
+
+    def __init__(self, client: httpx.AsyncClient, rps: float, duration: float, body: bytes, seed: int):
+        self.client = client
+        self.rps = rps
+        self.duration = duration
+        self.body = body
+        self.rng = random.Random(seed)
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.late = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def pick(self):
+        weights = [item[0] for item in TRAFFIC_MIX]
+        return self.rng.choices(TRAFFIC_MIX, weights=weights)[0]
+
+    async def one(self, method: str, path: str, scheduled: float):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await self.client.request(method, path, content=self.body if method == "POST" else None)
+            if response.status_code >= 400:
+                self.errors += 1
+            else:
+                # от запланированного времени, чтобы отставание генератора не пряталось
+                self.latencies.append(time.perf_counter() - scheduled)
+        except httpx.HTTPError:
+            self.errors += 1
+        finally:
+            self.in_flight -= 1
+
+    async def run(self, through_gateway: bool):
+        tasks = []
+        total = int(self.rps * self.duration)
+        started = time.perf_counter()
+        for i in range(total):
+            scheduled = started + i / self.rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -0.01:
+                self.late += 1
+            _, method, gateway_path, upstream_path = self.pick()
+            path = gateway_path if through_gateway else upstream_path
+            tasks.append(asyncio.create_task(self.one(method, path, scheduled)))
+        await asyncio.gather(*tasks)
+        self.elapsed = time.perf_counter() - started
+
+    def summary(self) -> dict:
+        values = sorted(self.latencies)
+        return {
+            "sent": len(self.latencies) + self.errors,
+            "errors": self.errors,
+            "late_starts": self.late,
+            "achieved_rps": (len(self.latencies) + self.errors) / self.elapsed,
+            "peak_in_flight": self.peak_in_flight,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+
+
+async def sample_process(pid: int, samples: list, stop: asyncio.Event, interval: float = 0.1):
+    while not stop.is_set():
+        samples.append(read_proc(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def drive(base_url: str, args, through_gateway: bool, gateway_pid: int | None = None) -> dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.client_keepalive)
+    body = json.dumps({"message": "x" * args.request_bytes}).encode()
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        warmup = OpenLoopRun(client, args.rps, min(args.duration, 2), body, args.seed + 1)
+        await warmup.run(through_gateway)
+
+        async with httpx.AsyncClient() as control:
+            await control.post(f"{args.stub_url}/__reset")
+        samples: list[tuple[int, int]] = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_process(gateway_pid, samples, stop)) if gateway_pid else None
+
+        run = OpenLoopRun(client, args.rps, args.duration, body, args.seed)
+        await run.run(through_gateway)
+        stop.set()
+        if sampler:
+            await sampler
+
+    result = run.summary()
+    async with httpx.AsyncClient() as control:
+        result["upstream"] = (await control.get(f"{args.stub_url}/__stats")).json()
+    if samples:
+        result["peak_rss_kb"] = max(rss for rss, _ in samples)
+        result["peak_fds"] = max(fds for _, fds in samples)
+    return result
+
+
+async def main_async(args) -> dict:
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    gateway_url = f"http://127.0.0.1:{args.gateway_port}"
+    args.stub_url = stub_url
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stub = start_process([
+        "-m", "loadtest.upstream_stub", "--port", str(args.stub_port),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--payload-bytes", str(args.payload_bytes),
+    ])
+    gateway = start_process(
+        ["-m", "uvicorn", "main:app", "--port", str(args.gateway_port), "--log-level", "warning", "--no-access-log"],
+        env={key: f"{stub_url}{prefix}" for key, prefix in UPSTREAM_ENV.items()},
+    )
+    try:
+        await wait_ready(f"{stub_url}/__stats")
+        await wait_ready(f"{gateway_url}/docs")
+        idle_rss, idle_fds = read_proc(gateway.pid)
+
+        direct = await drive(stub_url, args, through_gateway=False)
+        proxied = await drive(gateway_url, args, through_gateway=True, gateway_pid=gateway.pid)
+        proxied["idle_rss_kb"] = idle_rss
+        proxied["idle_fds"] = idle_fds
+        return {"direct": direct, "gateway": proxied}
+    finally:
+        for process in (gateway, stub):
+            process.terminate()
+        for process in (gateway, stub):
+            process.wait(timeout=10)
+
+
+def report(results: dict, args):
+    direct, gateway = results["direct"], results["gateway"]
+    print(
+        f"target {args.rps:.0f} rps for {args.duration:.0f}s, upstream latency {args.latency_ms:.0f}ms, "
+        f"payload {args.payload_bytes} B"
+    )
+    print(f"{'':<9} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'late':>6} {'in-flight':>10}")
+    for label, r in (("direct", direct), ("gateway", gateway)):
+        print(
+            f"{label:<9} {r['achieved_rps']:8.1f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} "
+            f"{r['errors']:7d} {r['late_starts']:6d} {r['peak_in_flight']:10d}"
+        )
+    print(
+        f"gateway overhead: p50 {gateway['p50_ms'] - direct['p50_ms']:+.2f} ms, "
+        f"p95 {gateway['p95_ms'] - direct['p95_ms']:+.2f} ms, p99 {gateway['p99_ms'] - direct['p99_ms']:+.2f} ms"
+    )
+    upstream = gateway["upstream"]
+    print(
+        f"upstream connections opened by gateway: {upstream['connections']} for {upstream['requests']} requests "
+        f"(direct run: {direct['upstream']['connections']})"
+    )
+    print(f"gateway open fds: idle {gateway['idle_fds']}, peak {gateway.get('peak_fds', 0)}")
+    growth = gateway.get("peak_rss_kb", 0) - gateway["idle_rss_kb"]
+    per_request = growth / max(gateway["peak_in_flight"], 1)
+    print(
+        f"gateway RSS: idle {gateway['idle_rss_kb'] / 1024:.1f} MiB, peak {gateway.get('peak_rss_kb', 0) / 1024:.1f} MiB, "
+        f"~{per_request:.1f} KiB per concurrent request"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20, help="upstream stub latency")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--payload-bytes", type=int, default=2048, help="upstream response size")
+    parser.add_argument("--request-bytes", type=int, default=256, help="POST body size")
+    parser.add_argument("--client-keepalive", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--stub-port", type=int, default=9101)
+    parser.add_argument("--gateway-port", type=int, default=9100)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="also write raw results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    report(results, args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
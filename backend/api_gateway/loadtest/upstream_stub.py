@@ -0,0 +1,83 @@
+"""Stub upstream for the gateway load test.
+
+Answers any path after --latency-ms (± --jitter-ms) with a JSON body of about
+--payload-bytes. Counts requests and distinct client (host, port) pairs, i.e. TCP
+connections opened to it. GET /__stats returns the counters, POST /__reset clears them.
+
+    python -m loadtest.upstream_stub --port 9101 --latency-ms 20 --payload-bytes 2048
+"""
+import argparse
+import asyncio
+import json
+import random
+
+import uvicorn
+
+
+class UpstreamStub:
+    def __init__(self, latency_ms: float, jitter_ms: float, payload_bytes: int):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.payload = b'{"data":"' + b"x" * max(0, payload_bytes - 11) + b'"}'
+        self.requests = 0
+        self.peers: set[tuple[str, int]] = set()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "connections": len(self.peers)}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        path = scope["path"]
+        if path == "/__stats":
+            return await self.respond(send, json.dumps(self.stats()).encode())
+        if path == "/__reset":
+            self.requests = 0
+            self.peers.clear()
+            return await self.respond(send, b"{}")
+
+        self.requests += 1
+        if scope.get("client"):
+            self.peers.add(tuple(scope["client"]))
+        more_body = True
+        while more_body:
+            message = await receive()
+            more_body = message.get("more_body", False)
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.respond(send, self.payload)
+
+    @staticmethod
+    async def respond(send, body: bytes):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9101)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--payload-bytes", type=int, default=2048)
+    args = parser.parse_args()
+    stub = UpstreamStub(args.latency_ms, args.jitter_ms, args.payload_bytes)
+    uvicorn.run(stub, host=args.host, port=args.port, log_level="warning", access_log=False, backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""watchlist unique (user_id, stock_symbol) and user_id indexes
+
+Revision ID: b8d2f4a6c913
+Revises: 0e5c55149015
+Create Date: 2025-06-09 14:21:07.518342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d2f4a6c913'
+down_revision: Union[str, None] = '0e5c55149015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # до ограничения дубли были возможны (гонка между SELECT и INSERT) — оставляем самую раннюю запись
+    op.execute("""
+        DELETE FROM watchlistitem a
+        USING watchlistitem b
+        WHERE a.user_id = b.user_id AND a.stock_symbol = b.stock_symbol AND a.id > b.id
+    """)
+    # уникальный индекс начинается с user_id, отдельный индекс по user_id не нужен
+    op.create_unique_constraint('uq_watchlistitem_user_id_stock_symbol', 'watchlistitem', ['user_id', 'stock_symbol'])
+    # лотов одного тикера может быть несколько, поэтому здесь обычный индекс
+    op.create_index('ix_portfolioitem_user_id_ticker', 'portfolioitem', ['user_id', 'ticker'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_portfolioitem_user_id_ticker', table_name='portfolioitem')
+    op.drop_constraint('uq_watchlistitem_user_id_stock_symbol', 'watchlistitem', type_='unique')
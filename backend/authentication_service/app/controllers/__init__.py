@@ -1,3 +1,4 @@
 from .auth_controller import AuthController
 from .watchlist_controller import WatchlistController
-from .portfolio_controller import PortfolioController
\ No newline at end of file
+from .portfolio_controller import PortfolioController
+from .metrics_controller import MetricsController
\ No newline at end of file
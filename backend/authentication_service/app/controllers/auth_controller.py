@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
 from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.services import AuthService, EmailService, OAuthService,  get_auth_service, get_email_service, get_oauth_service
-from app.schemas import UserCreate, Token, PasswordChange, RefreshTokenRequest, LoginRequest
+from app.services import AuthService, EmailService, OAuthService,  get_auth_service, get_email_service, get_oauth_service, get_current_identity
+from app.schemas import UserCreate, Token, PasswordChange, RefreshTokenRequest, LoginRequest, Identity
 import logging
 from typing import Dict
 from starlette.datastructures import URL
@@ -47,15 +47,16 @@ class AuthController:
                                 auth_service: AuthService = Depends(get_auth_service)):
             return await auth_service.refresh_token(payload.refresh_token)
 
+        @self.router.post("/logout")
+        async def logout(payload: RefreshTokenRequest,
+                         auth_service: AuthService = Depends(get_auth_service)):
+            return await auth_service.logout(payload.refresh_token)
+
         @self.router.post("/change-password")
         async def change_password(data: PasswordChange, 
-                                  request: Request, 
-                                  db: AsyncSession = Depends(get_db),                           
+                                  identity: Identity = Depends(get_current_identity),
                                   auth_service: AuthService = Depends(get_auth_service)):
-            email = request.headers.get("X-User-Email")
-            if not email:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
-            return await auth_service.change_password(email, data.old_password, data.new_password)
+            return await auth_service.change_password(identity.email, data.old_password, data.new_password)
 
         @self.router.get("/login/google")
         async def google_login(request: Request,
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Query
+
+from ..core import get_config_service
+from ..database import DBService, get_db_service
+from ..services import (
+    QuoteService, get_quote_service, PortfolioAnalyticsService, get_portfolio_analytics_service,
+    IdentityService, get_identity_service, PasswordHasher, get_password_hasher,
+    TokenRevocationService, get_token_revocation_service,
+)
+
+
+class MetricsController:
+    def __init__(self):
+        self.router = APIRouter(prefix="/metrics", tags=["metrics"])
+        # отпечатки SQL и состояние пула — только для внутренней сети, по умолчанию выключено
+        self.db_metrics_enabled = get_config_service().get("DB_METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.register_routes()
+
+    def register_routes(self):
+        if self.db_metrics_enabled:
+            @self.router.get("/db")
+            async def get_db_metrics(
+                top: int = Query(20, ge=1, le=500),
+                db_service: DBService = Depends(get_db_service),
+            ):
+                """Пул соединений, ожидание checkout и латентность запросов по отпечаткам SQL."""
+                return db_service.metrics.snapshot(top=top)
+
+        @self.router.get("/portfolio")
+        async def get_portfolio_metrics(
+            quote_service: QuoteService = Depends(get_quote_service),
+            analytics_service: PortfolioAnalyticsService = Depends(get_portfolio_analytics_service),
+        ):
+            """Попадания в кэш котировок и кэш аналитики портфеля."""
+            return {"quotes": quote_service.get_stats(), "analytics": analytics_service.get_stats()}
+
+        @self.router.get("/identity")
+        async def get_identity_metrics(identity_service: IdentityService = Depends(get_identity_service)):
+            """Сколько запросов опознано по claims токена, из кэша и через SELECT."""
+            return identity_service.get_stats()
+
+        @self.router.get("/password-hashing")
+        async def get_password_hashing_metrics(password_hasher: PasswordHasher = Depends(get_password_hasher)):
+            """Очередь и латентность bcrypt: ожидание свободного потока и само хэширование."""
+            return password_hasher.get_stats()
+
+        @self.router.get("/revocation")
+        async def get_revocation_metrics(
+            revocation_service: TokenRevocationService = Depends(get_token_revocation_service),
+        ):
+            """Проверки отзыва refresh-токенов: сколько отсеял Bloom-фильтр, сколько ушло в Redis."""
+            return revocation_service.get_stats()
+
+    def get_router(self):
+        return self.router
@@ -1,10 +1,15 @@
 # portfolio_controller.py
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Path
+from fastapi import APIRouter, Depends, HTTPException, Path
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete
 from sqlalchemy.future import select
 from app.database import get_db
-from ..models import User, PortfolioItem
-from ..schemas import PortfolioItemCreate, PortfolioItemResponse
+from ..models import PortfolioItem
+from ..schemas import PortfolioItemCreate, PortfolioItemResponse, PortfolioAnalytics, Identity
+from ..services import (
+    QuoteService, get_quote_service, PortfolioAnalyticsService, get_portfolio_analytics_service,
+    get_current_identity,
+)
 
 class PortfolioController:
     def __init__(self):
@@ -15,14 +20,9 @@ class PortfolioController:
         @self.router.get("/", response_model=list[PortfolioItemResponse])
         async def get_portfolio(
             db: AsyncSession = Depends(get_db),
-            request: Request = None
+            identity: Identity = Depends(get_current_identity),
         ):
-            email = request.headers.get("X-User-Email")
-            if not email:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
-
-            user = await self._get_user_by_email(email, db)
-            result = await db.execute(select(PortfolioItem).filter(PortfolioItem.user_id == user.id))
+            result = await db.execute(select(PortfolioItem).filter(PortfolioItem.user_id == identity.user_id))
             items = result.scalars().all()
 
             return [
@@ -30,57 +30,62 @@ class PortfolioController:
                 for item in items
             ]
 
+        @self.router.get("/analytics", response_model=PortfolioAnalytics)
+        async def get_portfolio_analytics(
+            db: AsyncSession = Depends(get_db),
+            identity: Identity = Depends(get_current_identity),
+            quote_service: QuoteService = Depends(get_quote_service),
+            analytics_service: PortfolioAnalyticsService = Depends(get_portfolio_analytics_service),
+        ):
+            """Позиции по тикерам с рыночной стоимостью, P&L, весами, доходностью и волатильностью."""
+            return await analytics_service.get_analytics(identity.user_id, db, quote_service)
+
         @self.router.post("/", status_code=201)
         async def add_to_portfolio(
             item: PortfolioItemCreate,
             db: AsyncSession = Depends(get_db),
-            request: Request = None
+            identity: Identity = Depends(get_current_identity),
+            analytics_service: PortfolioAnalyticsService = Depends(get_portfolio_analytics_service),
         ):
-            email = request.headers.get("X-User-Email")
-            if not email:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
-
-            user = await self._get_user_by_email(email, db)
-
             new_item = PortfolioItem(
-                user_id=user.id,
+                user_id=identity.user_id,
                 ticker=item.ticker,
                 shares=item.shares,
                 price=item.price
             )
             db.add(new_item)
             await db.commit()
+            analytics_service.invalidate(identity.user_id)
             return {"message": "Stock added to portfolio"}
 
         @self.router.delete("/{ticker}")
         async def delete_from_portfolio(
             ticker: str = Path(...),
             db: AsyncSession = Depends(get_db),
-            request: Request = None
+            identity: Identity = Depends(get_current_identity),
+            analytics_service: PortfolioAnalyticsService = Depends(get_portfolio_analytics_service),
         ):
-            email = request.headers.get("X-User-Email")
-            if not email:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
-
-            user = await self._get_user_by_email(email, db)
-            result = await db.execute(select(PortfolioItem).filter(
-                PortfolioItem.user_id == user.id, PortfolioItem.ticker == ticker
-            ))
-            item = result.scalars().first()
-            if not item:
+            # как и раньше, удаляется один (самый ранний) лот тикера — одним DELETE с подзапросом
+            first_lot = (
+                select(PortfolioItem.id)
+                .where(PortfolioItem.user_id == identity.user_id, PortfolioItem.ticker == ticker)
+                .order_by(PortfolioItem.id)
+                .limit(1)
+                .scalar_subquery()
+            )
+            result = await db.execute(
+                delete(PortfolioItem)
+                .where(PortfolioItem.id == first_lot)
+                .returning(PortfolioItem.id)
+                .execution_options(synchronize_session=False)
+            )
+            deleted = result.first()
+            await db.commit()
+            if not deleted:
                 raise HTTPException(status_code=404, detail="Stock not found in portfolio")
 
-            await db.delete(item)
-            await db.commit()
+            analytics_service.invalidate(identity.user_id)
             return {"message": f"{ticker} removed from portfolio"}
 
-    async def _get_user_by_email(self, email: str, db: AsyncSession) -> User:
-        result = await db.execute(select(User).filter(User.email == email))
-        user = result.scalars().first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
-    
-    
     def get_router(self):
         return self.router
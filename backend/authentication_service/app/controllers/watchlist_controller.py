@@ -1,74 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, status, Request, Body
+from fastapi import APIRouter, Depends, HTTPException, Path, Body
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.future import select
 from app.database import get_db
-from app.models import User, WatchlistItem
+from app.models import WatchlistItem
+from app.schemas import EnrichedWatchlistResponse, Identity
+from app.services import QuoteService, get_quote_service, get_current_identity
+from app.core import get_config_service
 
 class WatchlistController:
     def __init__(self):
         self.router = APIRouter(prefix="/watchlist", tags=["watchlist"])
+        self.chart_points = int(get_config_service().get("WATCHLIST_CHART_POINTS", 14))
         self.register_routes()
 
     def register_routes(self):
         @self.router.get("/", response_model=dict)
-        async def get_watchlist(db: AsyncSession = Depends(get_db), request: Request = None):
-            email = request.headers.get("X-User-Email")
-            if not email:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
-            result = await db.execute(select(User).filter(User.email == email))
-            user = result.scalars().first()
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            result = await db.execute(select(WatchlistItem).filter(WatchlistItem.user_id == user.id))
+        async def get_watchlist(
+            db: AsyncSession = Depends(get_db),
+            identity: Identity = Depends(get_current_identity),
+        ):
+            result = await db.execute(select(WatchlistItem).filter(WatchlistItem.user_id == identity.user_id))
             items = result.scalars().all()
             return {"watchlist": [item.stock_symbol for item in items]}
 
+        @self.router.get("/enriched", response_model=EnrichedWatchlistResponse)
+        async def get_enriched_watchlist(
+            db: AsyncSession = Depends(get_db),
+            identity: Identity = Depends(get_current_identity),
+            quote_service: QuoteService = Depends(get_quote_service),
+        ):
+            """Watchlist с ценой, изменением и мини-графиком по каждому тикеру за один запрос к сервису котировок."""
+            result = await db.execute(
+                select(WatchlistItem.stock_symbol).filter(WatchlistItem.user_id == identity.user_id)
+            )
+            symbols = [row[0] for row in result.all()]
+            quotes = await quote_service.get_quotes(symbols) if symbols else {}
+            return {"watchlist": [self._enrich(symbol, quotes.get(symbol)) for symbol in symbols]}
+
         @self.router.post("/add")
         async def add_to_watchlist(
             stock_symbol: str = Body(..., embed=True),
             db: AsyncSession = Depends(get_db),
-            request: Request = None
+            identity: Identity = Depends(get_current_identity),
         ):
-            email = request.headers.get("X-User-Email")
-            if not email:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
-            result = await db.execute(select(User).filter(User.email == email))
-            user = result.scalars().first()
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
+            # один запрос: уникальный (user_id, stock_symbol) заменяет проверку SELECT-ом
             result = await db.execute(
-                select(WatchlistItem).filter(WatchlistItem.user_id == user.id, WatchlistItem.stock_symbol == stock_symbol)
+                pg_insert(WatchlistItem)
+                .values(user_id=identity.user_id, stock_symbol=stock_symbol)
+                .on_conflict_do_nothing(index_elements=["user_id", "stock_symbol"])
+                .returning(WatchlistItem.id)
             )
-            existing = result.scalars().first()
-            if existing:
-                raise HTTPException(status_code=400, detail="Stock already in watchlist")
-            new_item = WatchlistItem(user_id=user.id, stock_symbol=stock_symbol)
-            db.add(new_item)
+            inserted = result.first()
             await db.commit()
+            if not inserted:
+                raise HTTPException(status_code=400, detail="Stock already in watchlist")
             return {"message": "Stock added to watchlist"}
 
         @self.router.delete("/{ticker}")
         async def remove_from_watchlist(
             ticker: str = Path(..., description="Stock ticker to remove from watchlist"),
             db: AsyncSession = Depends(get_db),
-            request: Request = None
+            identity: Identity = Depends(get_current_identity),
         ):
-            email = request.headers.get("X-User-Email")
-            if not email:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
-            result = await db.execute(select(User).filter(User.email == email))
-            user = result.scalars().first()
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
             result = await db.execute(
-                select(WatchlistItem).filter(WatchlistItem.user_id == user.id, WatchlistItem.stock_symbol == ticker)
+                delete(WatchlistItem)
+                .where(WatchlistItem.user_id == identity.user_id, WatchlistItem.stock_symbol == ticker)
+                .returning(WatchlistItem.id)
+                .execution_options(synchronize_session=False)
             )
-            item = result.scalars().first()
-            if not item:
-                raise HTTPException(status_code=404, detail="Stock not in watchlist")
-            await db.delete(item)
+            deleted = result.first()
             await db.commit()
+            if not deleted:
+                raise HTTPException(status_code=404, detail="Stock not in watchlist")
             return {"message": "Stock removed from watchlist"}
 
+    def _enrich(self, symbol: str, quote: dict | None) -> dict:
+        if quote is None:
+            return {"stock_symbol": symbol}
+        return {
+            "stock_symbol": symbol,
+            "company_name": quote["companyName"],
+            "logo_url": quote["logoUrl"],
+            "current_price": quote["currentPrice"],
+            "share_change": quote["shareChange"],
+            "price_data": quote["priceData"][-self.chart_points:],
+        }
+
     def get_router(self):
-        return self.router
\ No newline at end of file
+        return self.router
@@ -6,8 +6,9 @@ from starlette.middleware.cors import CORSMiddleware
 import uvicorn
 import os
 from app.middlewares import register_middlewares
-from app.controllers import AuthController, WatchlistController, PortfolioController
-from app.services import get_email_service
+from app.controllers import AuthController, WatchlistController, PortfolioController, MetricsController
+from app.services import get_email_service, get_quote_service, get_password_hasher, get_token_revocation_service
+from app.redis.redis import close_redis_client
 from dotenv import load_dotenv
 
 from app.core import ConfigService
@@ -26,10 +27,17 @@ async def lifespan(app: FastAPI):
     consumer_task = asyncio.create_task(email_service.connect())
     print("✅ RabbitMQ consumer started")
 
+    revocation_service = get_token_revocation_service(config_service=config_service)
+    revocation_service.start()
+
     yield
 
     await email_service.close()
     consumer_task.cancel()
+    await get_quote_service(config_service=config_service).close()
+    get_password_hasher(config_service=config_service).shutdown()
+    await revocation_service.stop()
+    await close_redis_client()
     print("🔌 RabbitMQ consumer stopped")
 
 
@@ -45,6 +53,8 @@ auth_controller = AuthController()
 app.include_router(auth_controller.get_router())  
 portfolio_controller = PortfolioController()
 app.include_router(portfolio_controller.get_router())  
+metrics_controller = MetricsController()
+app.include_router(metrics_controller.get_router())
 
 
 if __name__ == "__main__":
@@ -1,9 +1,11 @@
 # models.py
-from sqlalchemy import Column, Integer, Float, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import Base, BaseModel
 
 class PortfolioItem(BaseModel, Base):
+    __table_args__ = (Index("ix_portfolioitem_user_id_ticker", "user_id", "ticker"),)
+
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     ticker = Column(String, nullable=False)
     shares = Column(Integer, nullable=False)
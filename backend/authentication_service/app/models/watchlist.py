@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
 from .base import Base, BaseModel
 
 class WatchlistItem(BaseModel, Base):
+    __table_args__ = (UniqueConstraint("user_id", "stock_symbol", name="uq_watchlistitem_user_id_stock_symbol"),)
+
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     stock_symbol = Column(String, nullable=False)
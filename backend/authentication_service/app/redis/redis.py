@@ -0,0 +1,40 @@
+import time
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError, RedisError
+
+from ..core import ConfigService
+
+
+_redis_client_instance: Redis | None = None
+_redis_retry_at: float = 0.0
+
+async def acquire_redis_client(config_service: ConfigService) -> Redis:
+    """Shared client for the process; raises ConnectionError while Redis is unreachable."""
+    global _redis_client_instance, _redis_retry_at
+    if _redis_client_instance is not None:
+        return _redis_client_instance
+    if time.monotonic() < _redis_retry_at:
+        # Redis недавно был недоступен — не ждём таймаут подключения на каждом запросе
+        raise ConnectionError("Redis is unavailable")
+    client = Redis(
+        host=config_service.get("REDIS_HOST", "localhost"),
+        port=int(config_service.get("REDIS_PORT", 6379)),
+        username=config_service.get("REDIS_USERNAME", "default"),
+        password=config_service.get("REDIS_PASSWORD", None),
+        decode_responses=True,
+    )
+    try:
+        await client.ping()
+    except RedisError:
+        _redis_retry_at = time.monotonic() + int(config_service.get("REDIS_RETRY_SECONDS", 30))
+        await client.aclose()
+        raise
+    _redis_client_instance = client
+    return client
+
+
+async def close_redis_client():
+    global _redis_client_instance
+    if _redis_client_instance is not None:
+        await _redis_client_instance.aclose()
+        _redis_client_instance = None
@@ -1,5 +1,6 @@
 from .user import UserCreate, UserOut, PasswordChange, LoginRequest
 from .token import Token, RefreshTokenRequest
-from .watchlist import WatchlistItemBase, WatchlistResponse
-from .portfolio import PortfolioItemCreate, PortfolioItemResponse
-from .email_to_send import EmailToSend
\ No newline at end of file
+from .watchlist import WatchlistItemBase, WatchlistResponse, MiniChartPoint, WatchlistQuote, EnrichedWatchlistResponse
+from .portfolio import PortfolioItemCreate, PortfolioItemResponse, PortfolioHolding, PortfolioPoint, PortfolioAnalytics
+from .email_to_send import EmailToSend
+from .identity import Identity
@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+
+class Identity(BaseModel):
+    user_id: int = Field(example=1)
+    email: str = Field(example="john@example.com")
+    role: str = Field(example="user")
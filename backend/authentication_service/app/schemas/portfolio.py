@@ -10,3 +10,35 @@ class PortfolioItemResponse(BaseModel):
     ticker: str
     shares: int
     price: float
+
+class PortfolioHolding(BaseModel):
+    ticker: str
+    company_name: str
+    shares: float
+    avg_price: float
+    cost_basis: float
+    current_price: float
+    market_value: float
+    unrealized_pnl: float
+    unrealized_pnl_pct: float
+    weight: float
+    daily_change_pct: float
+    volatility_annualized: float
+
+class PortfolioPoint(BaseModel):
+    date: str
+    value: float
+    daily_return: float
+
+class PortfolioAnalytics(BaseModel):
+    as_of: str | None
+    market_value: float
+    cost_basis: float
+    unrealized_pnl: float
+    unrealized_pnl_pct: float
+    daily_change_pct: float
+    volatility_daily: float
+    volatility_annualized: float
+    holdings: list[PortfolioHolding]
+    series: list[PortfolioPoint]
+    missing_tickers: list[str]
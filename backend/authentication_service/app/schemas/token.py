@@ -5,7 +5,7 @@ class Token(BaseModel):
     access_token: str = Field(description="JWT access token")
     refresh_token: str = Field(description="JWT refresh token")
     token_type: str = Field(example="Bearer")
-    user: UserOut  
+    user: UserOut | None = None
 
 class RefreshTokenRequest(BaseModel):
     refresh_token: str = Field(description="Refresh token used to get a new access token")
@@ -6,3 +6,17 @@ class WatchlistItemBase(BaseModel):
 class WatchlistResponse(BaseModel):
     watchlist: list[str] = Field(description="List of stock symbols in user's watchlist")
 
+class MiniChartPoint(BaseModel):
+    date: str
+    value: float
+
+class WatchlistQuote(BaseModel):
+    stock_symbol: str
+    company_name: str | None = Field(default=None, description="None if the stock service has no data for the symbol")
+    logo_url: str | None = None
+    current_price: float | None = None
+    share_change: float | None = None
+    price_data: list[MiniChartPoint] = Field(default_factory=list, description="Mini-chart, oldest first")
+
+class EnrichedWatchlistResponse(BaseModel):
+    watchlist: list[WatchlistQuote]
@@ -1,3 +1,8 @@
 from .email_service import EmailService, get_email_service
+from .password_hasher import PasswordHasher, get_password_hasher
+from .token_revocation_service import TokenRevocationService, BloomFilter, get_token_revocation_service
 from .auth_service import AuthService, get_auth_service
-from .oauth_service import OAuthService, get_oauth_service
\ No newline at end of file
+from .oauth_service import OAuthService, get_oauth_service
+from .quote_service import QuoteService, get_quote_service
+from .portfolio_analytics_service import PortfolioAnalyticsService, get_portfolio_analytics_service
+from .identity_service import IdentityService, get_identity_service, get_current_identity
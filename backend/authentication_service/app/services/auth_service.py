@@ -1,20 +1,24 @@
 import os
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Dict
-from jose import jwt, JWTError
-from passlib.context import CryptContext
+from jose import jwt, JWTError, ExpiredSignatureError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi import HTTPException, status
+from redis.exceptions import RedisError
 from app.models import User
 from app.schemas import UserCreate, Token, PasswordChange, RefreshTokenRequest, UserOut
 from fastapi import Depends
 
 from ..core import ConfigService, get_config_service
 from ..database import get_db
+from .password_hasher import PasswordHasher, get_password_hasher
+from .token_revocation_service import TokenRevocationService, get_token_revocation_service
 
 class AuthService:
-    def __init__(self, config_service, db: AsyncSession):
+    def __init__(self, config_service, db: AsyncSession, password_hasher: PasswordHasher,
+                 revocation_service: TokenRevocationService):
         self.config_service = config_service
         self.SECRET_KEY = self.config_service.get("SECRET_KEY")
         if not self.SECRET_KEY:
@@ -26,14 +30,20 @@ class AuthService:
         self.VERIFICATION_TOKEN_EXPIRE_MINUTES = 60
         self.ACCESS_TOKEN_EXPIRE_MINUTES = 60
         self.REFRESH_TOKEN_EXPIRE_DAYS = 7
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.password_hasher = password_hasher
+        self.revocation_service = revocation_service
         self.db = db
 
-    def get_password_hash(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        return await self.password_hasher.hash(password)
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.password_hasher.verify(plain_password, hashed_password)
+
+    @staticmethod
+    def token_claims(user: User) -> Dict:
+        """sub plus uid/role, so downstream handlers can identify the user without a DB lookup."""
+        return {"sub": user.email, "uid": user.id, "role": user.role.value}
 
     def create_access_token(self, data: Dict, expires_delta: Optional[timedelta] = None) -> str:
         to_encode = data.copy()
@@ -44,7 +54,8 @@ class AuthService:
     def create_refresh_token(self, data: Dict, expires_delta: Optional[timedelta] = None) -> str:
         to_encode = data.copy()
         expire = datetime.utcnow() + (expires_delta or timedelta(days=self.REFRESH_TOKEN_EXPIRE_DAYS))
-        to_encode.update({"exp": expire, "token_type": "refresh"})
+        # jti — идентификатор для отзыва при logout
+        to_encode.update({"exp": expire, "token_type": "refresh", "jti": uuid.uuid4().hex})
         return jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
 
     def create_verification_token(self, data: Dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -59,7 +70,7 @@ class AuthService:
         if existing_user:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-        hashed_pwd = self.get_password_hash(user.password)
+        hashed_pwd = await self.get_password_hash(user.password)
         new_user = User(
             username=user.username,
             email=user.email,
@@ -93,13 +104,22 @@ class AuthService:
     async def login_user(self, email: str, password: str) -> Token:
         result = await self.db.execute(select(User).where(User.email == email))
         user = result.scalars().first()
-        if not user or not user.hashed_password or not self.verify_password(password, user.hashed_password):
+        if not user or not user.hashed_password:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        valid, new_hash = await self.password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         if not user.email_verified:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not verified")
+        if new_hash:
+            # хэш со старым cost — заменяем, пока пароль у нас в руках
+            user.hashed_password = new_hash
+            await self.db.commit()
+            await self.db.refresh(user)
 
-        access_token = self.create_access_token({"sub": user.email})
-        refresh_token = self.create_refresh_token({"sub": user.email})
+        claims = self.token_claims(user)
+        access_token = self.create_access_token(claims)
+        refresh_token = self.create_refresh_token(claims)
         return Token(access_token=access_token, refresh_token=refresh_token, token_type="bearer", user=user)
 
     async def refresh_token(self, refresh_token: str) -> Token:
@@ -113,17 +133,43 @@ class AuthService:
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-        new_access_token = self.create_access_token({"sub": email})
-        new_refresh_token = self.create_refresh_token({"sub": email})
+        jti = token_data.get("jti")
+        if jti and await self.revocation_service.is_revoked(jti):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked")
+
+        # uid/role перечитываем из БД, иначе смена роли не дошла бы до пользователя, который только обновляет токены
+        result = await self.db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        claims = self.token_claims(user)
+        new_access_token = self.create_access_token(claims)
+        new_refresh_token = self.create_refresh_token(claims)
         return Token(access_token=new_access_token, refresh_token=new_refresh_token, token_type="bearer")
 
+    async def logout(self, refresh_token: str) -> Dict:
+        try:
+            token_data = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+        except ExpiredSignatureError:
+            return {"message": "Logged out"}
+        except JWTError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        if token_data.get("token_type") != "refresh":
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
+        if token_data.get("jti"):
+            try:
+                await self.revocation_service.revoke(token_data["jti"], token_data["exp"])
+            except RedisError:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Token store unavailable")
+        return {"message": "Logged out"}
+
     async def change_password(self, email: str, old_password: str, new_password: str) -> Dict:
         result = await self.db.execute(select(User).where(User.email == email))
         user = result.scalars().first()
-        if not user or not user.hashed_password or not self.verify_password(old_password, user.hashed_password):
+        if not user or not user.hashed_password or not await self.verify_password(old_password, user.hashed_password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Old password is incorrect")
 
-        user.hashed_password = self.get_password_hash(new_password)
+        user.hashed_password = await self.get_password_hash(new_password)
         await self.db.commit()
         return {"message": "Password changed successfully"}
 
@@ -148,12 +194,16 @@ class AuthService:
             await self.db.commit()
             await self.db.refresh(user)
 
-        access_token = self.create_access_token({"sub": user.email})
-        refresh_token = self.create_refresh_token({"sub": user.email})
+        claims = self.token_claims(user)
+        access_token = self.create_access_token(claims)
+        refresh_token = self.create_refresh_token(claims)
         return Token(access_token=access_token, refresh_token=refresh_token, token_type="bearer", user=UserOut(id=user.id, username=user.username, email=email,auth_provider=user.auth_provider, is_active=user.is_active))
     
 
 def get_auth_service(config_service: ConfigService = Depends(get_config_service), 
-                    db: AsyncSession = Depends(get_db)) -> AuthService:
+                    db: AsyncSession = Depends(get_db),
+                    password_hasher: PasswordHasher = Depends(get_password_hasher),
+                    revocation_service: TokenRevocationService = Depends(get_token_revocation_service)) -> AuthService:
     """Функция зависимости для предоставления экземпляра AuthService."""
-    return AuthService(config_service=config_service, db=db)
+    return AuthService(config_service=config_service, db=db, password_hasher=password_hasher,
+                       revocation_service=revocation_service)
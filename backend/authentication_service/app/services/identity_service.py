@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+from fastapi import Depends, HTTPException, Request, status
+from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..core import ConfigService, get_config_service
+from ..database import get_db
+from ..models import User
+from ..schemas import Identity
+
+
+class IdentityService:
+    """Resolves the calling user without a DB round trip where possible.
+
+    A Bearer access token that carries uid/role is trusted as is (it is signed with
+    SECRET_KEY). Otherwise the X-User-Email header is looked up through a short-TTL
+    cache, so repeated requests of the same user cost one SELECT per TTL.
+    """
+
+    ALGORITHM = "HS256"
+
+    def __init__(self, config_service: ConfigService):
+        self.secret_key = config_service.get("SECRET_KEY")
+        self.ttl = float(config_service.get("IDENTITY_CACHE_TTL_SECONDS", 60))
+        self.max_items = int(config_service.get("IDENTITY_CACHE_MAX_ITEMS", 10000))
+        self.cache: OrderedDict[str, tuple[float, Identity]] = OrderedDict()
+        self.stats = {"token_claims": 0, "cache_hits": 0, "db_lookups": 0}
+
+    def decode_access_token(self, token: str) -> dict:
+        try:
+            claims = jwt.decode(token, self.secret_key, algorithms=[self.ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+        if claims.get("token_type") == "refresh":
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type")
+        return claims
+
+    async def from_email(self, email: str, db: AsyncSession) -> Identity:
+        entry = self.cache.get(email)
+        if entry is not None and entry[0] > time.monotonic():
+            self.cache.move_to_end(email)
+            self.stats["cache_hits"] += 1
+            return entry[1]
+
+        self.stats["db_lookups"] += 1
+        result = await db.execute(select(User.id, User.role).where(User.email == email))
+        row = result.first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        identity = Identity(user_id=row.id, email=email, role=row.role.value)
+        self.cache[email] = (time.monotonic() + self.ttl, identity)
+        self.cache.move_to_end(email)
+        while len(self.cache) > self.max_items:
+            self.cache.popitem(last=False)
+        return identity
+
+    async def resolve(self, request: Request, db: AsyncSession) -> Identity:
+        authorization = request.headers.get("Authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            claims = self.decode_access_token(token)
+            if claims.get("uid") is not None and claims.get("sub"):
+                self.stats["token_claims"] += 1
+                return Identity(user_id=claims["uid"], email=claims["sub"], role=claims.get("role", "user"))
+            # токен выпущен до появления uid в claims — ищем по sub
+            email = claims.get("sub")
+        else:
+            email = request.headers.get("X-User-Email")
+        if not email:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
+        return await self.from_email(email, db)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "cached_identities": len(self.cache)}
+
+
+_identity_service_instance: IdentityService | None = None
+
+def get_identity_service(config_service: ConfigService = Depends(get_config_service)) -> IdentityService:
+    global _identity_service_instance
+    if _identity_service_instance is None:
+        _identity_service_instance = IdentityService(config_service)
+    return _identity_service_instance
+
+
+async def get_current_identity(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    identity_service: IdentityService = Depends(get_identity_service),
+) -> Identity:
+    """Dependency for handlers that need the calling user."""
+    return await identity_service.resolve(request, db)
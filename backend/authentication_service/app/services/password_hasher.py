@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import Depends, HTTPException, status
+from passlib.context import CryptContext
+
+from ..core import ConfigService, get_config_service
+
+
+class PasswordHasher:
+    """bcrypt on a small dedicated thread pool instead of the event loop.
+
+    bcrypt releases the GIL, so hashing runs in parallel with request handling and
+    a login burst only queues up here. Past PASSWORD_HASH_MAX_PENDING waiting
+    operations new ones are rejected with 503 rather than piling up latency.
+    """
+
+    def __init__(self, config_service: ConfigService):
+        self.rounds = int(config_service.get("BCRYPT_ROUNDS", 12))
+        self.workers = int(config_service.get("PASSWORD_HASH_WORKERS", 2))
+        self.max_pending = int(config_service.get("PASSWORD_HASH_MAX_PENDING", 64))
+        # хэши с другим cost помечаются как устаревшие и перехэшируются при входе
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=self.rounds,
+            bcrypt__min_desired_rounds=self.rounds,
+            bcrypt__max_desired_rounds=self.rounds,
+        )
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self.pending = 0
+        self.running = 0
+        self.running_lock = threading.Lock()
+        self.max_queue_depth = 0
+        self.stats = {"hash": 0, "verify": 0, "rehashed": 0, "rejected": 0}
+        self.wait_ms: deque[float] = deque(maxlen=1000)
+        self.run_ms: deque[float] = deque(maxlen=1000)
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many password operations, retry later")
+        self.pending += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.pending - self.running)
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            with self.running_lock:
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self.running_lock:
+                    self.running -= 1
+                self.wait_ms.append((started - submitted) * 1000)
+                self.run_ms.append((time.perf_counter() - started) * 1000)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        self.stats["hash"] += 1
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        self.stats["verify"] += 1
+        return await self._run(self.pwd_context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """(valid, new hash or None); a new hash is returned when the stored cost differs from BCRYPT_ROUNDS."""
+        self.stats["verify"] += 1
+        valid, new_hash = await self._run(self.pwd_context.verify_and_update, password, hashed_password)
+        if new_hash:
+            self.stats["rehashed"] += 1
+        return valid, new_hash
+
+    @staticmethod
+    def _percentile(values, q: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "running": self.running,
+            "queue_depth": self.pending - self.running,
+            "max_queue_depth": self.max_queue_depth,
+            "wait_ms_p50": self._percentile(self.wait_ms, 0.5),
+            "wait_ms_p95": self._percentile(self.wait_ms, 0.95),
+            "run_ms_p50": self._percentile(self.run_ms, 0.5),
+            "run_ms_p95": self._percentile(self.run_ms, 0.95),
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_password_hasher_instance: PasswordHasher | None = None
+
+def get_password_hasher(config_service: ConfigService = Depends(get_config_service)) -> PasswordHasher:
+    global _password_hasher_instance
+    if _password_hasher_instance is None:
+        _password_hasher_instance = PasswordHasher(config_service)
+    return _password_hasher_instance
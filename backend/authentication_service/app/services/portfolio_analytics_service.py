@@ -0,0 +1,165 @@
+import time
+import numpy as np
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from ..core import ConfigService, get_config_service
+from ..models import PortfolioItem
+from .quote_service import QuoteService
+
+TRADING_DAYS = 252
+
+
+class PortfolioAnalyticsService:
+    """Valuation of a user's lots against batched quotes, cached per user.
+
+    The cache keeps the user's lots (dropped on any portfolio edit) and the last result
+    together with the quotes it was computed from (date of the newest bar and every
+    current price); a new bar or an intraday price change triggers a recompute without
+    touching the database.
+
+    The cache is per process: invalidate() only clears this instance, so with several
+    instances the others can serve lots up to PORTFOLIO_CACHE_TTL_SECONDS old.
+    """
+
+    def __init__(self, config_service: ConfigService):
+        self.ttl = float(config_service.get("PORTFOLIO_CACHE_TTL_SECONDS", 300))
+        # user_id -> {"expires_at", "lots", "quotes_key", "result"}
+        self.cache: dict[int, dict] = {}
+        # user_id -> номер правки портфеля; лоты, прочитанные до правки, в кэш не кладём
+        self.versions: dict[int, int] = {}
+        self.stats = {"hits": 0, "recomputed": 0, "lot_loads": 0, "invalidations": 0}
+
+    def invalidate(self, user_id: int):
+        self.versions[user_id] = self.versions.get(user_id, 0) + 1
+        if self.cache.pop(user_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    async def get_analytics(self, user_id: int, db: AsyncSession, quote_service: QuoteService) -> dict:
+        entry = self.cache.get(user_id)
+        if entry is None or entry["expires_at"] <= time.monotonic():
+            version = self.versions.get(user_id, 0)
+            result = await db.execute(
+                select(PortfolioItem.ticker, PortfolioItem.shares, PortfolioItem.price)
+                .where(PortfolioItem.user_id == user_id)
+            )
+            entry = {"expires_at": time.monotonic() + self.ttl, "lots": result.all(), "quotes_key": None, "result": None}
+            # пока шёл SELECT, портфель могли изменить — тогда лоты годятся только для этого ответа
+            if self.versions.get(user_id, 0) == version:
+                self.cache[user_id] = entry
+            self.stats["lot_loads"] += 1
+
+        quotes = await quote_service.get_quotes(ticker for ticker, _, _ in entry["lots"])
+        # последний бар переписывается внутри дня без смены даты, поэтому ключ — дата и цены
+        as_of = max((q["priceData"][-1]["date"] for q in quotes.values() if q["priceData"]), default=None)
+        quotes_key = (as_of, tuple(sorted(
+            (ticker, q.get("currentPrice"), q["priceData"][-1]["value"] if q["priceData"] else None)
+            for ticker, q in quotes.items()
+        )))
+        if entry["result"] is not None and entry["quotes_key"] == quotes_key:
+            self.stats["hits"] += 1
+            return entry["result"]
+
+        entry["result"] = self.compute(entry["lots"], quotes)
+        entry["quotes_key"] = quotes_key
+        self.stats["recomputed"] += 1
+        return entry["result"]
+
+    @staticmethod
+    def compute(lots, quotes: dict[str, dict]) -> dict:
+        # лоты одного тикера складываем в позицию со средней ценой
+        positions: dict[str, list[float]] = {}
+        for ticker, shares, price in lots:
+            position = positions.setdefault(ticker, [0.0, 0.0])
+            position[0] += shares
+            position[1] += shares * price
+
+        # без котировок или без истории цен — тикер не оценить, сообщаем о нём
+        missing = sorted(t for t in positions if t not in quotes or not quotes[t]["priceData"])
+        tickers = [t for t in positions if t not in missing and positions[t][0]]
+        shares = np.array([positions[t][0] for t in tickers], dtype=float)
+        cost = np.array([positions[t][1] for t in tickers], dtype=float)
+
+        # матрица цен закрытия: тикеры x объединение дат, пропуски заполняем предыдущей ценой
+        dates = sorted({p["date"] for t in tickers for p in quotes[t]["priceData"]})
+        date_index = {d: i for i, d in enumerate(dates)}
+        closes = np.full((len(tickers), len(dates)), np.nan)
+        for row, ticker in enumerate(tickers):
+            for point in quotes[ticker]["priceData"]:
+                closes[row, date_index[point["date"]]] = point["value"]
+        if tickers:
+            filled = np.where(np.isnan(closes), 0, np.arange(len(dates)))
+            np.maximum.accumulate(filled, axis=1, out=filled)
+            closes = closes[np.arange(len(tickers))[:, None], filled]
+            # до первого бара считаем цену равной первой известной
+            first = closes[np.arange(len(tickers)), np.argmax(~np.isnan(closes), axis=1)]
+            closes = np.where(np.isnan(closes), first[:, None], closes)
+
+        current = np.array([quotes[t]["currentPrice"] for t in tickers], dtype=float)
+        market_value = shares * current
+        pnl = market_value - cost
+        total_value = float(market_value.sum())
+        total_cost = float(cost.sum())
+        weights = market_value / total_value if total_value else np.zeros_like(market_value)
+
+        values = shares @ closes if tickers else np.zeros(0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            asset_returns = np.diff(closes, axis=1) / closes[:, :-1] if tickers else np.zeros((0, 0))
+            portfolio_returns = np.diff(values) / values[:-1] if len(values) > 1 else np.zeros(0)
+        asset_returns = np.nan_to_num(asset_returns, nan=0.0, posinf=0.0, neginf=0.0)
+        portfolio_returns = np.nan_to_num(portfolio_returns, nan=0.0, posinf=0.0, neginf=0.0)
+        asset_vol = asset_returns.std(axis=1, ddof=1) if asset_returns.shape[1] > 1 else np.zeros(len(tickers))
+        portfolio_vol = float(portfolio_returns.std(ddof=1)) if len(portfolio_returns) > 1 else 0.0
+        last_asset_returns = asset_returns[:, -1] if asset_returns.shape[1] else np.zeros(len(tickers))
+
+        holdings = [
+            {
+                "ticker": ticker,
+                "company_name": quotes[ticker]["companyName"],
+                "shares": float(shares[i]),
+                "avg_price": round(cost[i] / shares[i], 4),
+                "cost_basis": round(float(cost[i]), 2),
+                "current_price": float(current[i]),
+                "market_value": round(float(market_value[i]), 2),
+                "unrealized_pnl": round(float(pnl[i]), 2),
+                "unrealized_pnl_pct": round(float(pnl[i] / cost[i] * 100), 2) if cost[i] else 0.0,
+                "weight": round(float(weights[i]), 4),
+                "daily_change_pct": round(float(last_asset_returns[i] * 100), 2),
+                "volatility_annualized": round(float(asset_vol[i] * np.sqrt(TRADING_DAYS)), 4),
+            }
+            for i, ticker in enumerate(tickers)
+        ]
+        series = [
+            {
+                "date": date,
+                "value": round(float(values[i]), 2),
+                "daily_return": round(float(portfolio_returns[i - 1]), 6) if i else 0.0,
+            }
+            for i, date in enumerate(dates)
+        ]
+        return {
+            "as_of": dates[-1] if dates else None,
+            "market_value": round(total_value, 2),
+            "cost_basis": round(total_cost, 2),
+            "unrealized_pnl": round(total_value - total_cost, 2),
+            "unrealized_pnl_pct": round((total_value - total_cost) / total_cost * 100, 2) if total_cost else 0.0,
+            "daily_change_pct": round(float(portfolio_returns[-1] * 100), 2) if len(portfolio_returns) else 0.0,
+            "volatility_daily": round(portfolio_vol, 6),
+            "volatility_annualized": round(portfolio_vol * float(np.sqrt(TRADING_DAYS)), 4),
+            "holdings": sorted(holdings, key=lambda h: h["market_value"], reverse=True),
+            "series": series,
+            "missing_tickers": missing,
+        }
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "cached_users": len(self.cache)}
+
+
+_portfolio_analytics_service_instance: PortfolioAnalyticsService | None = None
+
+def get_portfolio_analytics_service(config_service: ConfigService = Depends(get_config_service)) -> PortfolioAnalyticsService:
+    global _portfolio_analytics_service_instance
+    if _portfolio_analytics_service_instance is None:
+        _portfolio_analytics_service_instance = PortfolioAnalyticsService(config_service)
+    return _portfolio_analytics_service_instance
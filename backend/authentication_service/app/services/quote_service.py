@@ -0,0 +1,93 @@
+import time
+import httpx
+from fastapi import Depends, HTTPException
+
+from ..core import ConfigService, get_config_service
+
+
+class QuoteService:
+    """Quotes from the stock service's batch endpoint behind a short per-ticker TTL cache.
+
+    All tickers missing from the cache go out in one /stocks/quotes request, so a
+    portfolio or watchlist of any size costs at most one round trip.
+    """
+
+    MAX_TICKERS_PER_REQUEST = 200  # лимит /stocks/quotes
+
+    def __init__(self, config_service: ConfigService):
+        self.base_url = config_service.get("STOCK_SERVICE_URL", "http://localhost:8002/stocks")
+        self.ttl = float(config_service.get("QUOTE_CACHE_TTL_SECONDS", 30))
+        self.history_days = int(config_service.get("QUOTE_HISTORY_DAYS", 90))
+        self.timeout = float(config_service.get("QUOTE_TIMEOUT_SECONDS", 5))
+        # None — тикер неизвестен сервису котировок, тоже кэшируем
+        self.cache: dict[str, tuple[float, dict | None]] = {}
+        self.client: httpx.AsyncClient | None = None
+        self.stats = {"hits": 0, "misses": 0, "requests": 0, "errors": 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+        return self.client
+
+    async def get_quotes(self, tickers) -> dict[str, dict]:
+        """ticker -> StockResponse-shaped dict; unknown tickers are left out."""
+        now = time.monotonic()
+        quotes: dict[str, dict] = {}
+        missing: list[str] = []
+        for ticker in dict.fromkeys(tickers):
+            entry = self.cache.get(ticker)
+            if entry is not None and entry[0] > now:
+                self.stats["hits"] += 1
+                if entry[1] is not None:
+                    quotes[ticker] = entry[1]
+            else:
+                missing.append(ticker)
+
+        if missing:
+            self.stats["misses"] += len(missing)
+            fetched = await self._fetch(missing)
+            expires_at = time.monotonic() + self.ttl
+            for ticker in missing:
+                quote = fetched.get(ticker) or fetched.get(ticker.upper())
+                self.cache[ticker] = (expires_at, quote)
+                if quote is not None:
+                    quotes[ticker] = quote
+        return quotes
+
+    async def _fetch(self, tickers: list[str]) -> dict[str, dict]:
+        fetched: dict[str, dict] = {}
+        for i in range(0, len(tickers), self.MAX_TICKERS_PER_REQUEST):
+            chunk = tickers[i:i + self.MAX_TICKERS_PER_REQUEST]
+            self.stats["requests"] += 1
+            try:
+                response = await self._get_client().get(
+                    "/quotes", params={"tickers": ",".join(chunk), "days": self.history_days}
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                self.stats["errors"] += 1
+                raise HTTPException(status_code=502, detail=f"Stock service unavailable: {e}")
+            fetched.update((quote["ticker"], quote) for quote in response.json())
+        return fetched
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "cached_tickers": len(self.cache),
+        }
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+_quote_service_instance: QuoteService | None = None
+
+def get_quote_service(config_service: ConfigService = Depends(get_config_service)) -> QuoteService:
+    global _quote_service_instance
+    if _quote_service_instance is None:
+        _quote_service_instance = QuoteService(config_service)
+    return _quote_service_instance
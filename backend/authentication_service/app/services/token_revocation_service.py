@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import math
+import time
+from fastapi import Depends
+from redis.exceptions import RedisError
+
+from ..core import ConfigService, get_config_service
+from ..redis.redis import acquire_redis_client
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings; k positions by double hashing one blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocationService:
+    """Revoked refresh-token jti's: Redis is the source of truth, a Bloom filter answers locally.
+
+    Each revoked jti is a key revoked:jti:<jti> living until the token's own expiry, plus
+    a member of the revoked:jtis sorted set (score = expiry) that instances read to
+    rebuild their filter every TOKEN_REVOCATION_SYNC_SECONDS. Only logout writes; a
+    refresh whose jti is not in the filter is accepted without any I/O, a hit is
+    confirmed with one EXISTS. A jti revoked on another instance is seen here after the
+    next sync at the latest. Without Redis, logout fails instead of pretending to succeed,
+    sync() keeps the current filter and a filter hit counts as revoked.
+    """
+
+    KEY_PREFIX = "revoked:jti:"
+    SET_KEY = "revoked:jtis"
+
+    def __init__(self, config_service: ConfigService):
+        self.config_service = config_service
+        self.sync_seconds = float(config_service.get("TOKEN_REVOCATION_SYNC_SECONDS", 30))
+        self.capacity = int(config_service.get("TOKEN_REVOCATION_BLOOM_CAPACITY", 100000))
+        self.error_rate = float(config_service.get("TOKEN_REVOCATION_BLOOM_ERROR_RATE", 0.001))
+        self.bloom = BloomFilter(self.capacity, self.error_rate)
+        # отозванные этим экземпляром — подтверждаются без EXISTS и переживают пересборку фильтра
+        self.local: dict[str, float] = {}
+        self.synced_at: float | None = None
+        self.sync_task: asyncio.Task | None = None
+        self.stats = {
+            "checks": 0, "bloom_negatives": 0, "confirmed": 0, "false_positives": 0,
+            "redis_errors": 0, "revoked": 0, "syncs": 0,
+        }
+
+    async def revoke(self, jti: str, expires_at: float):
+        """Stores the revocation; raises RedisError when it cannot be stored."""
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return  # токен уже истёк, отзывать нечего
+        try:
+            redis = await acquire_redis_client(self.config_service)
+            # ключ для EXISTS и член множества для пересборки фильтров — одним запросом
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(self.KEY_PREFIX + jti, "1", ex=ttl)
+                pipe.zadd(self.SET_KEY, {jti: expires_at})
+                await pipe.execute()
+        except RedisError:
+            self.stats["redis_errors"] += 1
+            raise
+        self.local[jti] = expires_at
+        self.bloom.add(jti)
+        self.stats["revoked"] += 1
+
+    async def is_revoked(self, jti: str) -> bool:
+        self.stats["checks"] += 1
+        if jti not in self.bloom:
+            self.stats["bloom_negatives"] += 1
+            return False
+        if self.local.get(jti, 0) > time.time():
+            self.stats["confirmed"] += 1
+            return True
+        try:
+            redis = await acquire_redis_client(self.config_service)
+            revoked = bool(await redis.exists(self.KEY_PREFIX + jti))
+        except RedisError:
+            # подтвердить нельзя — считаем отозванным, ложное срабатывание лишь заставит войти заново
+            self.stats["redis_errors"] += 1
+            return True
+        self.stats["confirmed" if revoked else "false_positives"] += 1
+        return revoked
+
+    async def sync(self):
+        """Rebuilds the filter from the sorted set, dropping entries whose tokens have expired.
+
+        Without Redis the current filter is kept as is: an empty member list would erase
+        revocations made on other instances.
+        """
+        now = time.time()
+        try:
+            redis = await acquire_redis_client(self.config_service)
+            await redis.zremrangebyscore(self.SET_KEY, "-inf", now)
+            members = await redis.zrangebyscore(self.SET_KEY, now, "+inf")
+        except RedisError:
+            self.stats["redis_errors"] += 1
+            return
+        self.local = {jti: exp for jti, exp in self.local.items() if exp > now}
+        # при переполнении растим фильтр, иначе доля ложных срабатываний быстро растёт
+        bloom = BloomFilter(max(self.capacity, 2 * (len(members) + len(self.local))), self.error_rate)
+        for jti in members:
+            bloom.add(jti)
+        for jti in self.local:
+            bloom.add(jti)
+        self.bloom = bloom
+        self.synced_at = now
+        self.stats["syncs"] += 1
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print(f"❌ Revocation filter sync failed: {e}")
+            await asyncio.sleep(self.sync_seconds)
+
+    def start(self):
+        if self.sync_task is None or self.sync_task.done():
+            self.sync_task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self.sync_task is not None:
+            self.sync_task.cancel()
+            try:
+                await self.sync_task
+            except asyncio.CancelledError:
+                pass
+            self.sync_task = None
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "bloom_items": self.bloom.count,
+            "bloom_bits": self.bloom.size,
+            "bloom_hashes": self.bloom.hashes,
+            "synced_seconds_ago": round(time.time() - self.synced_at, 1) if self.synced_at else None,
+        }
+
+
+_token_revocation_service_instance: TokenRevocationService | None = None
+
+def get_token_revocation_service(config_service: ConfigService = Depends(get_config_service)) -> TokenRevocationService:
+    global _token_revocation_service_instance
+    if _token_revocation_service_instance is None:
+        _token_revocation_service_instance = TokenRevocationService(config_service)
+    return _token_revocation_service_instance
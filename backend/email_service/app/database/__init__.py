@@ -1 +1 @@
-from .dependency import get_db, get_db_service, DBService
\ No newline at end of file
+from .dependency import get_db, get_read_db, get_db_service, DBService
\ No newline at end of file
@@ -6,3 +6,8 @@ from typing import AsyncGenerator
 async def get_db(db_service: DBService = Depends(get_db_service)) -> AsyncGenerator[AsyncSession, None]:
     async for session in db_service.get_db():
         yield session
+
+async def get_read_db(db_service: DBService = Depends(get_db_service)) -> AsyncGenerator[AsyncSession, None]:
+    """Read-only GET handlers: replica if configured, primary otherwise."""
+    async for session in db_service.get_read_db():
+        yield session
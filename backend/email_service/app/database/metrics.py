@@ -0,0 +1,206 @@
+# metrics.py
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+logger = logging.getLogger("db_metrics")
+
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_FINGERPRINTS = 500
+
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"\$\d+|%\(\w+\)s|:\w+")
+_IN_LIST = re.compile(r"\(\s*\?(\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """SQL with literals and bind parameters replaced by '?', so similar queries share a histogram."""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    return _SPACES.sub(" ", sql).strip()[:300]
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> float | None:
+        """Upper bound of the bucket that holds the q-th percentile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        labels = [f"le_{b}" for b in BUCKETS_MS] + ["le_inf"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class CheckoutTimingMixin:
+    """Measures how long a caller waits for a connection from the pool."""
+
+    db_metrics: "DBMetrics | None" = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.db_metrics is not None:
+                self.db_metrics.observe_checkout_wait((time.perf_counter() - start) * 1000)
+
+
+class TimedAsyncAdaptedQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(CheckoutTimingMixin, NullPool):
+    pass
+
+
+class DBMetrics:
+    def __init__(self, slow_query_ms: float = 500):
+        self.slow_query_ms = slow_query_ms
+        self.lock = threading.Lock()
+        self.checkout_wait = LatencyHistogram()
+        self.queries: dict[str, LatencyHistogram] = {}
+        self.slow_queries = 0
+        self.errors = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.engines: dict[str, object] = {}
+        self.in_use: dict[str, int] = {}
+        self.peak_in_use: dict[str, int] = {}
+        self.connects: dict[str, int] = {}
+
+    def instrument(self, engine, name: str):
+        """Attaches pool and cursor event hooks to an (async) engine."""
+        sync_engine = getattr(engine, "sync_engine", engine)
+        self.engines[name] = sync_engine
+        self.in_use[name] = 0
+        self.peak_in_use[name] = 0
+        self.connects[name] = 0
+        if isinstance(sync_engine.pool, CheckoutTimingMixin):
+            sync_engine.pool.db_metrics = self
+
+        @event.listens_for(sync_engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.connects[name] += 1
+
+        @event.listens_for(sync_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.in_use[name] += 1
+            self.peak_in_use[name] = max(self.peak_in_use[name], self.in_use[name])
+
+        @event.listens_for(sync_engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            self.in_use[name] -= 1
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_execute(conn, cursor, statement, parameters, context, executemany):
+            start = conn.info["query_start"].pop()
+            self.observe_query(statement, (time.perf_counter() - start) * 1000)
+
+        @event.listens_for(sync_engine, "commit")
+        def on_commit(conn):
+            self.commits += 1
+
+        @event.listens_for(sync_engine, "rollback")
+        def on_rollback(conn):
+            self.rollbacks += 1
+
+        @event.listens_for(sync_engine, "handle_error")
+        def on_error(context):
+            starts = context.connection.info.get("query_start") if context.connection is not None else None
+            if starts:
+                starts.pop()
+            self.errors += 1
+
+    def observe_checkout_wait(self, ms: float):
+        with self.lock:
+            self.checkout_wait.observe(ms)
+
+    def observe_query(self, statement: str, ms: float):
+        key = fingerprint(statement)
+        with self.lock:
+            histogram = self.queries.get(key)
+            if histogram is None:
+                if len(self.queries) >= MAX_FINGERPRINTS:
+                    key = "<other>"
+                histogram = self.queries.setdefault(key, LatencyHistogram())
+            histogram.observe(ms)
+        if ms >= self.slow_query_ms:
+            self.slow_queries += 1
+            logger.warning("Slow query (%.1f ms): %s", ms, key)
+
+    def pool_stats(self) -> dict:
+        stats = {}
+        for name, engine in self.engines.items():
+            pool = engine.pool
+            stats[name] = {
+                "pool_class": type(pool).__name__,
+                "in_use": self.in_use[name],
+                "peak_in_use": self.peak_in_use[name],
+                "connects": self.connects[name],
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "idle": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            }
+        return stats
+
+    def snapshot(self, top: int = 20) -> dict:
+        with self.lock:
+            queries = sorted(self.queries.items(), key=lambda item: item[1].total_ms, reverse=True)[:top]
+            return {
+                "pools": self.pool_stats(),
+                "checkout_wait": self.checkout_wait.to_dict(),
+                "slow_query_ms": self.slow_query_ms,
+                "slow_queries": self.slow_queries,
+                "errors": self.errors,
+                "commits": self.commits,
+                "rollbacks": self.rollbacks,
+                "queries": [
+                    {"fingerprint": key, "total_ms": round(histogram.total_ms, 3), **histogram.to_dict()}
+                    for key, histogram in queries
+                ],
+            }
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends
 import uvicorn
 import os
 from app.middlewares import register_middlewares
@@ -7,7 +7,7 @@ from fastapi.dependencies.utils import solve_dependencies
 from app.services import get_rabbit_service, RabbitService, get_email_sender_service, EmailSenderService
 import asyncio
 from contextlib import asynccontextmanager
-from app.core import ConfigService
+from app.core import ConfigService, get_config_service
 from app.database import get_db, get_db_service, DBService
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
 load_dotenv(dotenv_path)
@@ -47,5 +47,11 @@ async def metrics(request: Request):
         return {"rabbitmq": "connected"}
     return {"rabbitmq": "disconnected"}
 
+# отпечатки SQL и состояние пула — только для внутренней сети, по умолчанию выключено
+if get_config_service().get("DB_METRICS_ENABLED", "false").lower() in ("1", "true", "yes"):
+    @app.get("/metrics/db")
+    async def db_metrics(top: int = 20, db_service: DBService = Depends(get_db_service)):
+        return db_service.metrics.snapshot(top=top)
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8003, reload=True)
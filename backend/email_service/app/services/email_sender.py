@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import Depends
 import aiosmtplib
 from email.message import EmailMessage
@@ -16,6 +17,8 @@ class EmailSenderService:
         self.username = config_service.get("SMTP_USERNAME")
         self.password = config_service.get("SMTP_PASSWORD")
         self.db = db
+        # сессия одна на весь consumer, а при prefetch > 1 письма обрабатываются параллельно
+        self.db_lock = asyncio.Lock()
 
     async def send_email(self, email_data: EmailToSend):
         msg = EmailMessage()
@@ -61,8 +64,9 @@ class EmailSenderService:
             created_at=datetime.datetime.utcnow(),
         )
 
-        self.db.add(email_log)
-        await self.db.commit()
+        async with self.db_lock:
+            self.db.add(email_log)
+            await self.db.commit()
 
 # Dependency for FastAPI
 def get_email_sender_service(config_service: ConfigService = Depends(get_config_service),
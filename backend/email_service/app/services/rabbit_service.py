@@ -14,6 +14,7 @@ class RabbitService:
         self.password = config_service.get("RABBIT_USERNAME")
         self.username = config_service.get("RABBIT_PASSWORD")
         self.email_queue = config_service.get("RABBIT_EMAIL_QUEUE")
+        self.prefetch_count = int(config_service.get("RABBIT_PREFETCH_COUNT", 10))
         self.email_sender = email_sender
         self.connection: aio_pika.RobustConnection | None = None
         self.channel: aio_pika.Channel | None = None
@@ -32,24 +33,26 @@ class RabbitService:
                 print(f"❌ RabbitMQ connection failed (retry {retries}): {e}")
                 await asyncio.sleep(2 ** retries)
 
+    async def on_message(self, message: aio_pika.IncomingMessage):
+        async with message.process():
+            try:
+                data = json.loads(message.body)
+                email_data = EmailToSend(**data)
+                print(email_data)
+                await self.email_sender.send_email(
+                    email_data
+                )
+                print(f"📤 Sent email to {email_data.email}")
+            except Exception as e:
+                print(f"❌ Failed to send email: {e}")
+
     async def start_consumer(self):
         await self.connect()
+        # без qos брокер отдавал всю очередь сразу; письма всё равно отправляются параллельно, но не больше prefetch
+        await self.channel.set_qos(prefetch_count=self.prefetch_count)
         queue = await self.channel.declare_queue(self.email_queue, durable=True)
 
-        async def on_message(message: aio_pika.IncomingMessage):
-            async with message.process():
-                try:
-                    data = json.loads(message.body)
-                    email_data = EmailToSend(**data)
-                    print(email_data)
-                    await self.email_sender.send_email(
-                        email_data
-                    )
-                    print(f"📤 Sent email to {email_data.email}")
-                except Exception as e:
-                    print(f"❌ Failed to send email: {e}")
-
-        await queue.consume(on_message)
+        await queue.consume(self.on_message)
         print("📥 Email consumer started.")
 
     async def stop(self):
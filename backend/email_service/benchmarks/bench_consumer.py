@@ -0,0 +1,146 @@
+"""Email consumer throughput with an in-memory broker (benchmarks.fake_amqp).
+
+Floods RabbitService.on_message with synthetic emails for each --prefetch value. SMTP
+is replaced by a stub that waits --smtp-latency-ms; the email log is written to the real
+DATABASE_URL through one shared session, the same way main.py wires it. Reports messages/s,
+DB statements and transactions per message (from DBService.metrics), and ack latency
+(delivery -> ack) p50/p95/p99. Inserted log rows are deleted afterwards unless --keep is given.
+
+    python -m benchmarks.bench_consumer --messages 2000 --prefetch 1 10 50 --smtp-latency-ms 50
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+
+from sqlalchemy import text
+
+from benchmarks.fake_amqp import FakeConnection
+from benchmarks.stats import summarize
+
+os.environ.setdefault("RABBIT_HOST", "fake")
+os.environ.setdefault("RABBIT_PORT", "5672")
+os.environ.setdefault("RABBIT_EMAIL_QUEUE", "emails")
+os.environ.setdefault("SMTP_PORT", "587")
+
+
+def email_payloads(count: int):
+    for i in range(count):
+        yield json.dumps({
+            "email": f"bench{i}@example.com",
+            "subject": "Benchmark",
+            "body": "Synthetic email body",
+            "cc": None,
+            "bcc": None,
+            "attachments": None,
+        }).encode()
+
+
+def db_counters(metrics) -> tuple[int, int]:
+    with metrics.lock:
+        statements = sum(histogram.count for histogram in metrics.queries.values())
+    return statements, metrics.commits
+
+
+async def run_case(args, prefetch: int) -> dict:
+    os.environ["RABBIT_PREFETCH_COUNT"] = str(prefetch)
+    from app.core import ConfigService
+    from app.database import get_db_service
+    from app.services import RabbitService, EmailSenderService
+    from app.services import email_sender
+
+    async def fake_smtp_send(*args_, **kwargs):
+        await asyncio.sleep(args.smtp_latency_ms / 1000)
+
+    email_sender.aiosmtplib.send = fake_smtp_send
+
+    config = ConfigService()
+    db_service = get_db_service(config)
+    async with db_service.async_session_maker() as session:
+        max_id = await session.scalar(text("SELECT coalesce(max(id), 0) FROM emaillog"))
+
+        service = RabbitService(config, EmailSenderService(config, session))
+        connection = FakeConnection()
+
+        async def connect():
+            service.connection = connection
+            service.channel = await connection.channel()
+
+        service.connect = connect
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            await service.start_consumer()
+            queue = service.channel.queues[service.email_queue]
+            statements_before, commits_before = db_counters(db_service.metrics)
+
+            started = time.perf_counter()
+            for body in email_payloads(args.messages):
+                queue.publish(body)
+            await asyncio.wait_for(queue.drained.wait(), timeout=args.timeout)
+            elapsed = time.perf_counter() - started
+
+            statements_after, commits_after = db_counters(db_service.metrics)
+            await service.stop()
+
+        if not args.keep:
+            await session.execute(text("DELETE FROM emaillog WHERE id > :max_id"), {"max_id": max_id})
+            await session.commit()
+
+    latency = summarize(queue.ack_latencies, elapsed)
+    statements = statements_after - statements_before
+    transactions = commits_after - commits_before
+    return {
+        "prefetch": prefetch,
+        "msgs_per_s": args.messages / elapsed,
+        "statements_per_msg": statements / args.messages,
+        "transactions_per_msg": transactions / args.messages,
+        # BEGIN и COMMIT — тоже обращения к базе
+        "round_trips_per_msg": (statements + 2 * transactions) / args.messages,
+        "ack_p50_ms": latency["p50_ms"],
+        "ack_p95_ms": latency["p95_ms"],
+        "ack_p99_ms": latency["p99_ms"],
+        "errors": log.getvalue().count("❌"),
+    }
+
+
+async def run(args) -> list[dict]:
+    results = []
+    for prefetch in args.prefetch:
+        result = await run_case(args, prefetch)
+        results.append(result)
+        print(
+            f"{prefetch:>8} {result['msgs_per_s']:9.1f} {result['round_trips_per_msg']:9.2f} "
+            f"{result['statements_per_msg']:8.2f} {result['transactions_per_msg']:8.3f} "
+            f"{result['ack_p50_ms']:8.2f} {result['ack_p95_ms']:8.2f} {result['ack_p99_ms']:8.2f} {result['errors']:6d}"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--prefetch", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--smtp-latency-ms", type=float, default=50)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--keep", action="store_true", help="keep inserted email logs")
+    parser.add_argument("--json", help="also write raw results to this file")
+    args = parser.parse_args()
+    if not os.environ.get("DATABASE_URL"):
+        parser.error("DATABASE_URL is not set")
+
+    print(f"{args.messages} emails, SMTP latency {args.smtp_latency_ms:.0f}ms")
+    print(
+        f"{'prefetch':>8} {'msg/s':>9} {'trips/msg':>9} {'stmt/msg':>8} {'tx/msg':>8} "
+        f"{'ack p50':>8} {'ack p95':>8} {'ack p99':>8} {'errors':>6}"
+    )
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
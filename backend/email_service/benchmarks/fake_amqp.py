@@ -0,0 +1,171 @@
+"""In-memory stand-in for the parts of aio_pika the consumers use.
+
+FakeConnection/FakeChannel/FakeQueue/FakeMessage mimic connect_robust() results closely
+enough for RabbitService: set_qos() limits unacked deliveries per consumer, consume()
+runs every delivery as its own task, and ack/nack/reject/process() behave like aio_pika
+(nack/reject with requeue put the message back at the head of the queue). Delivery and
+settle times are recorded so benchmarks can report ack latency.
+"""
+import asyncio
+import time
+from collections import deque
+
+
+class FakeMessage:
+    def __init__(self, queue: "FakeQueue", body: bytes, delivery_tag: int):
+        self.queue = queue
+        self.body = body
+        self.delivery_tag = delivery_tag
+        self.published_at = time.perf_counter()
+        self.delivered_at: float | None = None
+        self.redelivered = False
+        self.processed = False
+
+    async def ack(self):
+        self._settle("ack", requeue=False)
+
+    async def nack(self, requeue: bool = True):
+        self._settle("nack", requeue=requeue)
+
+    async def reject(self, requeue: bool = False):
+        self._settle("reject", requeue=requeue)
+
+    def _settle(self, outcome: str, requeue: bool):
+        if self.processed:
+            raise RuntimeError(f"Message {self.delivery_tag} already processed")
+        self.processed = True
+        self.queue.settle(self, outcome, requeue)
+
+    def process(self, requeue: bool = False, ignore_processed: bool = False):
+        return _ProcessContext(self, requeue, ignore_processed)
+
+
+class _ProcessContext:
+    def __init__(self, message: FakeMessage, requeue: bool, ignore_processed: bool):
+        self.message = message
+        self.requeue = requeue
+        self.ignore_processed = ignore_processed
+
+    async def __aenter__(self):
+        return self.message
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.ignore_processed and self.message.processed:
+            return
+        if exc_type is not None:
+            if not self.message.processed:
+                await self.message.reject(requeue=self.requeue)
+        elif not self.message.processed:
+            await self.message.ack()
+
+
+class FakeQueue:
+    def __init__(self, channel: "FakeChannel", name: str):
+        self.channel = channel
+        self.name = name
+        self.ready: deque[FakeMessage] = deque()
+        self.next_tag = 1
+        self.callback = None
+        self.wakeup = asyncio.Event()
+        self.dispatcher: asyncio.Task | None = None
+        self.tasks: set[asyncio.Task] = set()
+        self.unacked = 0
+        self.acked = 0
+        self.nacked = 0
+        self.rejected = 0
+        self.redeliveries = 0
+        self.ack_latencies: list[float] = []
+        self.end_to_end_latencies: list[float] = []
+        self.drained = asyncio.Event()
+
+    def publish(self, body: bytes):
+        self.ready.append(FakeMessage(self, body, self.next_tag))
+        self.next_tag += 1
+        self.drained.clear()
+        self.wakeup.set()
+
+    async def consume(self, callback):
+        self.callback = callback
+        self.dispatcher = asyncio.create_task(self._dispatch())
+        return f"ctag-{self.name}"
+
+    async def _dispatch(self):
+        while True:
+            while self.ready and self.channel.has_capacity(self):
+                message = self.ready.popleft()
+                message.delivered_at = time.perf_counter()
+                self.unacked += 1
+                task = asyncio.create_task(self.callback(message))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            self.wakeup.clear()
+            await self.wakeup.wait()
+
+    def settle(self, message: FakeMessage, outcome: str, requeue: bool):
+        now = time.perf_counter()
+        self.unacked -= 1
+        if outcome == "ack":
+            self.acked += 1
+            self.ack_latencies.append(now - message.delivered_at)
+            self.end_to_end_latencies.append(now - message.published_at)
+        elif outcome == "nack":
+            self.nacked += 1
+        else:
+            self.rejected += 1
+        if requeue:
+            self.redeliveries += 1
+            redelivery = FakeMessage(self, message.body, message.delivery_tag)
+            redelivery.published_at = message.published_at
+            redelivery.redelivered = True
+            self.ready.appendleft(redelivery)
+        elif not self.ready and self.unacked == 0:
+            self.drained.set()
+        self.wakeup.set()
+
+    async def cancel(self):
+        if self.dispatcher:
+            self.dispatcher.cancel()
+
+
+class FakeChannel:
+    def __init__(self, connection: "FakeConnection"):
+        self.connection = connection
+        # как basic.qos с global=False: лимит на каждого consumer, 0 — без ограничения
+        self.prefetch_count = 0
+        self.queues: dict[str, FakeQueue] = {}
+
+    async def set_qos(self, prefetch_count: int = 0, **kwargs):
+        self.prefetch_count = prefetch_count
+        self.wake_all()
+
+    async def declare_queue(self, name: str, durable: bool = False, **kwargs) -> FakeQueue:
+        if name not in self.queues:
+            self.queues[name] = FakeQueue(self, name)
+        return self.queues[name]
+
+    def has_capacity(self, queue: FakeQueue) -> bool:
+        return self.prefetch_count == 0 or queue.unacked < self.prefetch_count
+
+    def wake_all(self):
+        for queue in self.queues.values():
+            queue.wakeup.set()
+
+    async def close(self):
+        for queue in self.queues.values():
+            await queue.cancel()
+
+
+class FakeConnection:
+    def __init__(self):
+        self.is_closed = False
+        self.channels: list[FakeChannel] = []
+
+    async def channel(self) -> FakeChannel:
+        channel = FakeChannel(self)
+        self.channels.append(channel)
+        return channel
+
+    async def close(self):
+        for channel in self.channels:
+            await channel.close()
+        self.is_closed = True
@@ -0,0 +1,22 @@
+"""Latency summaries shared by the benchmark scripts."""
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict:
+    """Throughput and p50/p95/p99 (ms) for a list of latencies in seconds."""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "rps": len(values) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+    }
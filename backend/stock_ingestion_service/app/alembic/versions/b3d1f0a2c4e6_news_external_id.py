@@ -0,0 +1,30 @@
+"""news external_id for dedupe
+
+Revision ID: b3d1f0a2c4e6
+Revises: 6f7eea2d3ff3
+Create Date: 2025-06-02 18:41:12.311904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d1f0a2c4e6'
+down_revision: Union[str, None] = '6f7eea2d3ff3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('news', sa.Column('external_id', sa.BigInteger(), nullable=True))
+    op.create_index(op.f('ix_news_external_id'), 'news', ['external_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_news_external_id'), table_name='news')
+    op.drop_column('news', 'external_id')
@@ -0,0 +1,127 @@
+"""partition stockprice by year, brin on date
+
+Revision ID: d4a8c2e6f1b3
+Revises: b3d1f0a2c4e6
+Create Date: 2025-06-05 14:12:37.908215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a8c2e6f1b3'
+down_revision: Union[str, None] = 'b3d1f0a2c4e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, date, open, high, low, close, volume, company_id, ticker, created_at, updated_at, is_deleted"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Старую таблицу переименовываем вместе с индексами, чтобы освободить имена
+    op.execute("ALTER TABLE stockprice RENAME TO stockprice_old")
+    op.execute("ALTER TABLE stockprice_old RENAME CONSTRAINT stockprice_pkey TO stockprice_old_pkey")
+    op.execute("ALTER INDEX ix_stockprice_id RENAME TO ix_stockprice_old_id")
+    op.execute("ALTER INDEX ix_stockprice_date RENAME TO ix_stockprice_old_date")
+    op.execute("ALTER INDEX ix_stockprice_company_id RENAME TO ix_stockprice_old_company_id")
+
+    # В партиционированной таблице ключ партиционирования обязан входить в PK
+    op.execute("""
+        CREATE TABLE stockprice (
+            id INTEGER NOT NULL DEFAULT nextval('stockprice_id_seq'),
+            date DATE NOT NULL,
+            open DOUBLE PRECISION NOT NULL,
+            high DOUBLE PRECISION NOT NULL,
+            low DOUBLE PRECISION NOT NULL,
+            close DOUBLE PRECISION NOT NULL,
+            volume BIGINT NOT NULL,
+            company_id INTEGER REFERENCES company (id),
+            ticker VARCHAR,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE,
+            is_deleted BOOLEAN NOT NULL,
+            PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    op.execute("ALTER SEQUENCE stockprice_id_seq OWNED BY stockprice.id")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION create_stockprice_partition(p_year INTEGER) RETURNS VOID AS $$
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF stockprice FOR VALUES FROM (%L) TO (%L)',
+                'stockprice_y' || p_year, make_date(p_year, 1, 1), make_date(p_year + 1, 1, 1)
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Вызывается сервисом при старте и раз в сутки, чтобы партиция на следующий год была заранее
+    op.execute("""
+        CREATE OR REPLACE FUNCTION ensure_stockprice_partitions(p_years_ahead INTEGER DEFAULT 1) RETURNS VOID AS $$
+        DECLARE
+            current_year INTEGER := extract(year FROM current_date)::INTEGER;
+        BEGIN
+            FOR y IN current_year .. current_year + p_years_ahead LOOP
+                PERFORM create_stockprice_partition(y);
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        DO $$
+        DECLARE
+            first_year INTEGER;
+            last_year INTEGER;
+        BEGIN
+            SELECT extract(year FROM min(date))::INTEGER, extract(year FROM max(date))::INTEGER
+              INTO first_year, last_year
+              FROM stockprice_old;
+            first_year := coalesce(first_year, extract(year FROM current_date)::INTEGER);
+            last_year := greatest(coalesce(last_year, 0), extract(year FROM current_date)::INTEGER + 1);
+            FOR y IN first_year .. last_year LOOP
+                PERFORM create_stockprice_partition(y);
+            END LOOP;
+        END;
+        $$
+    """)
+
+    # Индексы на родителе создаются в каждой партиции автоматически
+    op.create_index('ix_stockprice_id', 'stockprice', ['id'], unique=False)
+    op.create_index('ix_stockprice_date_brin', 'stockprice', ['date'], unique=False, postgresql_using='brin')
+    op.create_index('ix_stockprice_company_id_date', 'stockprice', ['company_id', 'date'], unique=False)
+
+    op.execute(f"INSERT INTO stockprice ({COLUMNS}) SELECT {COLUMNS} FROM stockprice_old")
+    op.drop_table('stockprice_old')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE stockprice RENAME TO stockprice_partitioned")
+    op.create_table('stockprice',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('volume', sa.BigInteger(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('ticker', sa.String(), nullable=True),
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('stockprice_id_seq')"), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.PrimaryKeyConstraint('id', name='stockprice_pkey')
+    )
+    op.execute("ALTER SEQUENCE stockprice_id_seq OWNED BY stockprice.id")
+    op.execute(f"INSERT INTO stockprice ({COLUMNS}) SELECT {COLUMNS} FROM stockprice_partitioned")
+    op.drop_table('stockprice_partitioned')
+    op.execute("DROP FUNCTION IF EXISTS ensure_stockprice_partitions(INTEGER)")
+    op.execute("DROP FUNCTION IF EXISTS create_stockprice_partition(INTEGER)")
+    op.create_index(op.f('ix_stockprice_company_id'), 'stockprice', ['company_id'], unique=False)
+    op.create_index(op.f('ix_stockprice_date'), 'stockprice', ['date'], unique=False)
+    op.create_index(op.f('ix_stockprice_id'), 'stockprice', ['id'], unique=False)
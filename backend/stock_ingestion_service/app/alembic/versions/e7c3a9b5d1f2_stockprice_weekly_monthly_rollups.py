@@ -0,0 +1,122 @@
+"""stockprice weekly/monthly rollups
+
+Revision ID: e7c3a9b5d1f2
+Revises: d4a8c2e6f1b3
+Create Date: 2025-06-07 11:03:52.417733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c3a9b5d1f2'
+down_revision: Union[str, None] = 'd4a8c2e6f1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUPS = {"stockprice_weekly": "week", "stockprice_monthly": "month"}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ROLLUPS:
+        op.create_table(
+            table,
+            sa.Column('company_id', sa.Integer(), nullable=False),
+            sa.Column('ticker', sa.String(), nullable=True),
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('open', sa.Float(), nullable=False),
+            sa.Column('high', sa.Float(), nullable=False),
+            sa.Column('low', sa.Float(), nullable=False),
+            sa.Column('close', sa.Float(), nullable=False),
+            sa.Column('volume', sa.BigInteger(), nullable=False),
+            sa.Column('bar_count', sa.Integer(), nullable=False),
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('is_deleted', sa.Boolean(), nullable=False),
+            sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('company_id', 'period_start', name=f'uq_{table}_company_period'),
+        )
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
+
+    # Пересчитывает только затронутые недели/месяцы: бакеты, пересекающие [p_from, p_to].
+    # Бакеты обновляются через ON CONFLICT, а удаляются только те, для которых не осталось
+    # дневных баров: DELETE + INSERT из двух конкурентных транзакций падал бы на
+    # uq_*_company_period. ORDER BY даёт одинаковый порядок блокировок и не даёт
+    # транзакциям сцепиться в deadlock.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_stockprice_rollups(p_company_ids INTEGER[], p_from DATE, p_to DATE)
+        RETURNS VOID AS $$
+        DECLARE
+            r RECORD;
+            bucket_from DATE;
+            bucket_to DATE;
+        BEGIN
+            FOR r IN SELECT * FROM (VALUES ('stockprice_weekly', 'week'), ('stockprice_monthly', 'month')) AS t(tbl, unit) LOOP
+                bucket_from := date_trunc(r.unit, p_from)::date;
+                bucket_to := (date_trunc(r.unit, p_to) + ('1 ' || r.unit)::interval)::date;
+
+                EXECUTE format($q$
+                    INSERT INTO %I (company_id, ticker, period_start, open, high, low, close, volume, bar_count, is_deleted)
+                    SELECT company_id,
+                           max(ticker),
+                           date_trunc(%L, date)::date AS period_start,
+                           (array_agg(open ORDER BY date))[1],
+                           max(high),
+                           min(low),
+                           (array_agg(close ORDER BY date DESC))[1],
+                           sum(volume),
+                           count(*),
+                           false
+                    FROM stockprice
+                    WHERE company_id = ANY($1) AND date >= $2 AND date < $3 AND NOT is_deleted
+                    GROUP BY company_id, date_trunc(%L, date)
+                    ORDER BY company_id, period_start
+                    ON CONFLICT (company_id, period_start) DO UPDATE SET
+                        ticker = EXCLUDED.ticker,
+                        open = EXCLUDED.open,
+                        high = EXCLUDED.high,
+                        low = EXCLUDED.low,
+                        close = EXCLUDED.close,
+                        volume = EXCLUDED.volume,
+                        bar_count = EXCLUDED.bar_count,
+                        is_deleted = false,
+                        updated_at = now()
+                $q$, r.tbl, r.unit, r.unit) USING p_company_ids, bucket_from, bucket_to;
+
+                EXECUTE format($q$
+                    DELETE FROM %I AS rollup
+                    WHERE rollup.company_id = ANY($1) AND rollup.period_start >= $2 AND rollup.period_start < $3
+                      AND NOT EXISTS (
+                          SELECT 1 FROM stockprice
+                          WHERE stockprice.company_id = rollup.company_id
+                            AND stockprice.date >= rollup.period_start
+                            AND stockprice.date < rollup.period_start + ('1 ' || %L)::interval
+                            AND NOT stockprice.is_deleted
+                      )
+                $q$, r.tbl, r.unit) USING p_company_ids, bucket_from, bucket_to;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Заполняем по уже загруженной истории
+    op.execute("""
+        SELECT refresh_stockprice_rollups(array_agg(DISTINCT company_id), min(date), max(date))
+        FROM stockprice
+        WHERE company_id IS NOT NULL
+        HAVING count(*) > 0
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP FUNCTION IF EXISTS refresh_stockprice_rollups(INTEGER[], DATE, DATE)")
+    for table in ROLLUPS:
+        op.drop_index(op.f(f'ix_{table}_id'), table_name=table)
+        op.drop_table(table)
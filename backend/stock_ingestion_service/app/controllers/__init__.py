@@ -1,4 +1,5 @@
 from .stock_controller import StockController
 from .news_controller import NewsController
 from .llm_controller import LLMController
-from .company_controller import CompanyController
\ No newline at end of file
+from .company_controller import CompanyController
+from .metrics_controller import MetricsController
\ No newline at end of file
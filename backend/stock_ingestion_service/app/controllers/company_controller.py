@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.database import get_db
+from app.database import get_read_db
 from app.models import Company
 from app.schemas import CompanySchema
 
@@ -12,7 +12,7 @@ class CompanyController:
 
     def register_routes(self):
         @self.router.get("/", response_model=list[CompanySchema])
-        async def get_all_companies(db: AsyncSession = Depends(get_db)):
+        async def get_all_companies(db: AsyncSession = Depends(get_read_db)):
             try:
                 result = await db.execute(select(Company).where(Company.is_deleted == False))
                 companies = result.scalars().all()
@@ -23,7 +23,7 @@ class CompanyController:
         @self.router.get("/{ticker}", response_model=CompanySchema)
         async def get_company_by_ticker(
             ticker: str,
-            db: AsyncSession = Depends(get_db)):
+            db: AsyncSession = Depends(get_read_db)):
             """Получить данные по конкретной компании по тикеру."""
             try:
                 result = await db.execute(select(Company).where(Company.is_deleted == False, Company.ticker == ticker))
@@ -1,36 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-import openai
-from requests import request
+import json
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
-from ..core import ConfigService, get_config_service
-from ..services import NewsService, get_news_service
-from ..schemas import NewsItem, LLMPromptRequest
-from ..models import News
+from ..services import (
+    LLMService, LLMBusyError, get_llm_service,
+    LLMCacheService, get_llm_cache_service,
+    ContextPackService, get_context_pack_service,
+)
+from ..schemas import LLMPromptRequest
+from ..redis.redis import get_redis_client
 
 class LLMController:
     def __init__(self):
         self.router = APIRouter(prefix="/chat-gpt", tags=["chat-gpt"])
-        self.client = openai.OpenAI(api_key=get_config_service().get("OPEN_AI_TOKEN", ""))
         self.register_routes()
 
     def register_routes(self):
         @self.router.post("/", response_model=str)
         async def get_all_news(
-            request: LLMPromptRequest
+            request: LLMPromptRequest,
+            response: Response,
+            llm_service: LLMService = Depends(get_llm_service),
+            cache_service: LLMCacheService = Depends(get_llm_cache_service),
+            context_service: ContextPackService = Depends(get_context_pack_service),
+            redis=Depends(get_redis_client),
         ):
+            messages = await self._build_messages(request, llm_service, context_service)
+            cache_key = cache_service.make_key(
+                messages, llm_service.model, llm_service.resolve_temperature(request.temperature)
+            )
+            if request.use_cache:
+                cached = await cache_service.get(cache_key, redis)
+                if cached is not None:
+                    response.headers["X-Cache"] = "HIT"
+                    return cached
+            else:
+                cache_service.mark_bypassed()
+
             try:
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",  # Или "gpt-4", если у тебя есть доступ
-                    messages=[
-                        {"role": "user", "content": request.message}
-                    ],
-                    temperature=0.7,
-                )
-                reply = response.choices[0].message.content
-                return reply
+                reply = await llm_service.complete(messages, temperature=request.temperature)
+            except LLMBusyError as e:
+                raise HTTPException(status_code=503, detail=str(e))
             except Exception as e:
                 return f"❌ Ошибка при обращении к GPT: {str(e)}"
-            
-            
+
+            await cache_service.set(cache_key, reply, redis)
+            response.headers["X-Cache"] = "MISS"
+            return reply
+
+        @self.router.post("/stream")
+        async def stream_reply(
+            request: LLMPromptRequest,
+            llm_service: LLMService = Depends(get_llm_service),
+            cache_service: LLMCacheService = Depends(get_llm_cache_service),
+            context_service: ContextPackService = Depends(get_context_pack_service),
+            redis=Depends(get_redis_client),
+        ):
+            """Ответ модели по токенам в формате Server-Sent Events."""
+            messages = await self._build_messages(request, llm_service, context_service)
+            cache_key = cache_service.make_key(
+                messages, llm_service.model, llm_service.resolve_temperature(request.temperature)
+            )
+            cached = None
+            if request.use_cache:
+                cached = await cache_service.get(cache_key, redis)
+            else:
+                cache_service.mark_bypassed()
+
+            slot = None
+            if cached is None:
+                # слот берём до ответа: при перегрузке клиент получает 503, как и в POST /
+                try:
+                    slot = await llm_service.reserve()
+                except LLMBusyError as e:
+                    raise HTTPException(status_code=503, detail=str(e))
+
+            async def event_stream():
+                if cached is not None:
+                    yield f"data: {json.dumps({'token': cached}, ensure_ascii=False)}\n\n"
+                    yield "event: done\ndata: {\"cached\": true}\n\n"
+                    return
+                tokens = []
+                try:
+                    async for token in llm_service.stream(messages, temperature=request.temperature, slot=slot):
+                        tokens.append(token)
+                        yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+                except Exception as e:
+                    yield f"event: error\ndata: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+                    return
+                await cache_service.set(cache_key, "".join(tokens), redis)
+                yield "event: done\ndata: {\"cached\": false}\n\n"
+
+            return StreamingResponse(
+                event_stream(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                # если генератор так и не стартовал, слот отпускает фоновая задача ответа
+                background=BackgroundTask(slot.release) if slot else None,
+            )
+
+        @self.router.get("/cache/stats")
+        async def get_cache_stats(cache_service: LLMCacheService = Depends(get_llm_cache_service)):
+            return cache_service.get_stats()
+
+    async def _build_messages(
+        self,
+        request: LLMPromptRequest,
+        llm_service: LLMService,
+        context_service: ContextPackService,
+    ) -> list[dict]:
+        tickers = [request.ticker] if request.ticker else context_service.detect_tickers(request.message)
+        packs = [await context_service.get_pack(ticker) for ticker in tickers]
+        return llm_service.build_messages(request.message, [pack for pack in packs if pack])
+
     def get_router(self):
         return self.router
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+
+from ..core import get_config_service
+from ..database import DBService, get_db_service
+
+
+class MetricsController:
+    def __init__(self):
+        self.router = APIRouter(prefix="/metrics", tags=["metrics"])
+        # отпечатки SQL и состояние пула — только для внутренней сети, по умолчанию выключено
+        self.db_metrics_enabled = get_config_service().get("DB_METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.register_routes()
+
+    def register_routes(self):
+        if self.db_metrics_enabled:
+            @self.router.get("/db")
+            async def get_db_metrics(
+                top: int = Query(20, ge=1, le=500),
+                db_service: DBService = Depends(get_db_service),
+            ):
+                """Пул соединений, ожидание checkout и латентность запросов по отпечаткам SQL."""
+                return db_service.metrics.snapshot(top=top)
+
+    def get_router(self):
+        return self.router
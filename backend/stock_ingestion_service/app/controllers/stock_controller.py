@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 
-from ..services import StockService, get_stock_service
-from ..schemas import StockResponse
-from ..core import logger
+from ..services import StockService, get_stock_service, PriceHub, get_price_hub
+from ..schemas import StockResponse, HistoryBar
+from ..core import logger, get_config_service
 
 class StockController:
+    KEEPALIVE_SECONDS = 15
+    MAX_QUOTE_TICKERS = 200
+
     def __init__(self):
         self.router = APIRouter(prefix="/stocks", tags=["stocks"])
+        # Быстрый путь: dict -> orjson без повторной валидации через response_model
+        self.fast_json = get_config_service().get("STOCK_FAST_JSON", "false").lower() in ("1", "true", "yes")
         self.register_routes()
 
     def register_routes(self):
@@ -15,6 +24,8 @@ class StockController:
             stock_service: StockService = Depends(get_stock_service),
         ):
             try:
+                if self.fast_json:
+                    return self._json(await stock_service.get_popular_stocks(as_dict=True))
                 return await stock_service.get_popular_stocks()
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
@@ -24,6 +35,8 @@ class StockController:
             stock_service: StockService = Depends(get_stock_service),
         ):
             try:
+                if self.fast_json:
+                    return self._json(await stock_service.get_top_moves(as_dict=True))
                 return await stock_service.get_top_moves()
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
@@ -48,10 +61,125 @@ class StockController:
                 if not price_data:
                     raise HTTPException(status_code=404, detail="Нет ценовых данных")
 
+                if self.fast_json:
+                    return self._json(stock_service.build_stock_payload(price_data, [company], [company_id])[0])
                 return (await stock_service.process_stock_data(price_data, [company], [company_id]))[0]
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
-            
+        @self.router.get("/quotes", response_model=list[StockResponse])
+        async def get_quotes(
+            tickers: str = Query(..., description="Тикеры через запятую"),
+            days: int = Query(14, ge=1, le=365),
+            stock_service: StockService = Depends(get_stock_service),
+        ):
+            """Котировки и мини-графики сразу по нескольким тикерам; неизвестные тикеры пропускаются."""
+            requested = self._parse_tickers(tickers)
+            if not requested:
+                raise HTTPException(status_code=400, detail="tickers is empty")
+            if len(requested) > self.MAX_QUOTE_TICKERS:
+                raise HTTPException(status_code=400, detail=f"At most {self.MAX_QUOTE_TICKERS} tickers per request")
+            try:
+                if self.fast_json:
+                    return self._json(await stock_service.get_quotes(list(requested), days, as_dict=True))
+                return await stock_service.get_quotes(list(requested), days)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.router.get("/history/{ticker}", response_model=list[HistoryBar])
+        async def get_stock_history(
+            ticker: str,
+            interval: str = Query("day", pattern="^(day|week|month)$"),
+            years: int = Query(1, ge=1, le=30),
+            stock_service: StockService = Depends(get_stock_service),
+        ):
+            """Свечи по тикеру за несколько лет: дневные, недельные или месячные."""
+            companies = await stock_service.fetch_company_info_by_ticker(ticker)
+            if not companies:
+                raise HTTPException(status_code=404, detail="Компания не найдена")
+            try:
+                bars = await stock_service.fetch_history(companies[0].id, interval, years)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            if self.fast_json:
+                return self._json(bars)
+            return bars
+
+        @self.router.websocket("/ws")
+        async def stream_prices_ws(
+            websocket: WebSocket,
+            tickers: str | None = Query(None, description="Тикеры через запятую, пусто — все"),
+            price_hub: PriceHub = Depends(get_price_hub),
+        ):
+            """Новые бары по подписанным тикерам через WebSocket."""
+            await websocket.accept()
+            try:
+                subscription = price_hub.subscribe(self._parse_tickers(tickers))
+            except RuntimeError as e:
+                await websocket.close(code=1013, reason=str(e))
+                return
+            try:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(subscription.get(), timeout=self.KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        # пустое сообщение, чтобы заметить отвалившийся клиент
+                        await websocket.send_text("{}")
+                        continue
+                    await websocket.send_text(event)
+            except WebSocketDisconnect:
+                pass
+            finally:
+                price_hub.unsubscribe(subscription)
+
+        @self.router.get("/stream")
+        async def stream_prices_sse(
+            tickers: str | None = Query(None, description="Тикеры через запятую, пусто — все"),
+            price_hub: PriceHub = Depends(get_price_hub),
+        ):
+            """Новые бары по подписанным тикерам через Server-Sent Events."""
+            if price_hub.subscribers >= price_hub.max_subscribers:
+                raise HTTPException(status_code=503, detail="Too many price stream subscribers")
+            subscribed_tickers = self._parse_tickers(tickers)
+
+            async def event_stream():
+                # подписываемся внутри генератора: если клиент ушёл до первого чанка,
+                # генератор не стартует и подписка не остаётся висеть в хабе
+                try:
+                    subscription = price_hub.subscribe(subscribed_tickers)
+                except RuntimeError as e:
+                    yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                    return
+                try:
+                    while True:
+                        try:
+                            event = await asyncio.wait_for(subscription.get(), timeout=self.KEEPALIVE_SECONDS)
+                        except asyncio.TimeoutError:
+                            yield ": keepalive\n\n"
+                            continue
+                        yield f"data: {event}\n\n"
+                finally:
+                    price_hub.unsubscribe(subscription)
+
+            return StreamingResponse(
+                event_stream(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        @self.router.get("/stream/stats")
+        async def get_stream_stats(price_hub: PriceHub = Depends(get_price_hub)):
+            return price_hub.get_stats()
+
+    @staticmethod
+    def _json(payload) -> Response:
+        return Response(content=orjson.dumps(payload), media_type="application/json")
+
+    @staticmethod
+    def _parse_tickers(tickers: str | None) -> set[str] | None:
+        if not tickers:
+            return None
+        return {t.strip() for t in tickers.split(",") if t.strip()} or None
+
     def get_router(self):
         return self.router
@@ -1 +1 @@
-from .dependency import get_db, DBService, get_db_service
\ No newline at end of file
+from .dependency import get_db, get_read_db, DBService, get_db_service
\ No newline at end of file
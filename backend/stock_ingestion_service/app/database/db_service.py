@@ -1,32 +1,81 @@
 # db_service.py
+import itertools
+import time
 from functools import lru_cache
 import uuid
 from sqlalchemy import NullPool
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from typing import AsyncGenerator
 from fastapi import Depends
 from ..core import ConfigService, get_config_service
+from .metrics import DBMetrics, TimedAsyncAdaptedQueuePool
+
+# pgbouncer-transaction: соединение меняется между транзакциями, prepared statements кэшировать нельзя
+# direct: прямое подключение к Postgres, кэш prepared statements asyncpg включён
+CONNECTION_PROFILES = ("pgbouncer-transaction", "direct")
 
 class DBService:
     def __init__(self, config : ConfigService):
         database_url = config.get("DATABASE_URL")
         if not database_url:
             raise ValueError("DATABASE_URL is not set in config!")
+        replica_urls = [url.strip() for url in config.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+        self.replica_retry_seconds = int(config.get("DATABASE_REPLICA_RETRY_SECONDS", 30))
+        self.connection_profile = config.get("DB_CONNECTION_PROFILE", "pgbouncer-transaction")
+        if self.connection_profile not in CONNECTION_PROFILES:
+            raise ValueError(f"DB_CONNECTION_PROFILE must be one of {CONNECTION_PROFILES}")
+        self.statement_cache_size = int(config.get("DB_STATEMENT_CACHE_SIZE", 100))
+        self.query_cache_size = int(config.get("DB_QUERY_CACHE_SIZE", 500))
+        self.metrics = DBMetrics(slow_query_ms=float(config.get("DB_SLOW_QUERY_MS", 500)))
+
+        self.engine = self._create_engine(database_url)
+        self.metrics.instrument(self.engine, "primary")
+        self.async_session_maker = self._create_session_maker(self.engine)
+        # запись и чтение-после-записи всегда идут в primary
+        self.write_session_maker = self.async_session_maker
+
+        self.replica_engines = [self._create_engine(url) for url in replica_urls]
+        for i, engine in enumerate(self.replica_engines):
+            self.metrics.instrument(engine, f"replica_{i}")
+        self.read_session_makers = [self._create_session_maker(engine) for engine in self.replica_engines]
+        self._replica_order = itertools.cycle(range(len(self.read_session_makers)))
+        self._replica_down_until = [0.0] * len(self.read_session_makers)
+
+    def _connection_options(self, database_url: str):
+        """URL and asyncpg connect_args for the configured connection profile."""
+        url = make_url(database_url)
+        if self.connection_profile == "direct":
+            url = url.update_query_dict({"prepared_statement_cache_size": str(self.statement_cache_size)})
+            return url, {"statement_cache_size": self.statement_cache_size}
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        return url, {
+            "statement_cache_size": 0,
+            # уникальные имена, чтобы не поймать чужой prepared statement на соединении PgBouncer
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
 
-        self.engine = create_async_engine(
-            database_url,
+    def _create_engine(self, database_url: str):
+        url, connect_args = self._connection_options(database_url)
+        return create_async_engine(
+            url,
             echo=False,
             pool_size=15,
             max_overflow=20,
             pool_timeout=30,
-            connect_args={"statement_cache_size": 0},
+            poolclass=TimedAsyncAdaptedQueuePool,
+            # компилированный SQL кэшируется на клиенте, это безопасно и за PgBouncer
+            query_cache_size=self.query_cache_size,
+            connect_args=connect_args,
             #poolclass=NullPool  # 🔑 Важно: без пула
             #pool_pre_ping=True,  
         )
 
-        self.async_session_maker = sessionmaker(
-            bind=self.engine,
+    @staticmethod
+    def _create_session_maker(engine):
+        return sessionmaker(
+            bind=engine,
             class_=AsyncSession,
             expire_on_commit=False,
         )
@@ -35,6 +84,27 @@ class DBService:
         async with self.async_session_maker() as session:
             yield session
 
+    async def get_read_db(self) -> AsyncGenerator[AsyncSession, None]:
+        """Session on a replica (round-robin), falling back to the primary if none is reachable."""
+        for _ in range(len(self.read_session_makers)):
+            index = next(self._replica_order)
+            if self._replica_down_until[index] > time.monotonic():
+                continue
+            session = self.read_session_makers[index]()
+            try:
+                await session.connection()
+            except Exception as e:
+                print(f"⚠️ Replica #{index} unavailable, skipping for {self.replica_retry_seconds}s: {e}")
+                self._replica_down_until[index] = time.monotonic() + self.replica_retry_seconds
+                await session.close()
+                continue
+            async with session:
+                yield session
+            return
+
+        async with self.async_session_maker() as session:
+            yield session
+
     async def init_db(self, base_model):
         async with self.engine.begin() as conn:
             await conn.run_sync(base_model.metadata.create_all)
@@ -46,4 +116,4 @@ def get_db_service(config_service: ConfigService = Depends(get_config_service))
     global _db_service_instance
     if _db_service_instance is None:
         _db_service_instance = DBService(config_service)
-    return _db_service_instance
\ No newline at end of file
+    return _db_service_instance
@@ -9,4 +9,13 @@ async def get_db(db_service: DBService = Depends(get_db_service)) -> AsyncGenera
             yield session
     except Exception as e:
         print(f"❌ Ошибка при получении сессии БД: {e}")
-        raise  # или можно вернуть HTTPException(status_code=500, detail="DB error")
\ No newline at end of file
+        raise  # или можно вернуть HTTPException(status_code=500, detail="DB error")
+
+async def get_read_db(db_service: DBService = Depends(get_db_service)) -> AsyncGenerator[AsyncSession, None]:
+    """Read-only GET handlers: replica if configured, primary otherwise."""
+    try:
+        async for session in db_service.get_read_db():
+            yield session
+    except Exception as e:
+        print(f"❌ Ошибка при получении сессии БД (чтение): {e}")
+        raise
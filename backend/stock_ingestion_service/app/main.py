@@ -5,12 +5,12 @@ from starlette.middleware.sessions import SessionMiddleware
 from starlette.middleware.cors import CORSMiddleware
 import uvicorn
 from app.middlewares import register_middlewares
-from app.controllers import StockController, NewsController, LLMController, CompanyController
+from app.controllers import StockController, NewsController, LLMController, CompanyController, MetricsController
 from dotenv import load_dotenv
 from .database import DBService
 from .core import ConfigService, get_config_service
 from .models import Base
-from app.services import RabbitService, get_rabbit_service
+from app.services import RabbitService, get_rabbit_service, get_partition_service, get_context_pack_service
 import os
 
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -24,11 +24,19 @@ async def lifespan(app: FastAPI):
 
     app.state.rabbit_service = rabbit_service
 
+    partition_service = get_partition_service(config_service=config_service)
+    partition_task = asyncio.create_task(partition_service.run())
+
+    context_pack_service = get_context_pack_service(config_service=config_service)
+    warm_up_task = asyncio.create_task(context_pack_service.warm_up())
+
     consumer_task = asyncio.create_task(rabbit_service.start_consumers())
     print("✅ RabbitMQ consumer started")
     yield
     await rabbit_service.stop()
     consumer_task.cancel()
+    partition_task.cancel()
+    warm_up_task.cancel()
     print("🔌 RabbitMQ consumer stopped")
 
 app = FastAPI(lifespan=lifespan, title="RASdevAI Stock Service")
@@ -44,6 +52,8 @@ llm_controller = LLMController()
 app.include_router(llm_controller.get_router())
 company_controller = CompanyController()
 app.include_router(company_controller.get_router())
+metrics_controller = MetricsController()
+app.include_router(metrics_controller.get_router())
 
 # @app.on_event("startup")
 # async def on_startup():
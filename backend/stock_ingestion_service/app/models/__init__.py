@@ -1,4 +1,5 @@
 from .company import Company
 from .stock_price import StockPrice
+from .stock_price_rollup import StockPriceWeekly, StockPriceMonthly
 from .base import Base
-from .news import News
\ No newline at end of file
+from .news import News
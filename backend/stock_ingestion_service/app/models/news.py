@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, BigInteger
 from .base import Base, BaseModel
 
 class News(BaseModel, Base):
@@ -11,3 +11,5 @@ class News(BaseModel, Base):
     negative = Column(Float)
     source = Column(String, nullable=False, default="")
     important = Column(Boolean, nullable=True)
+    # id новости в KASE, по нему дедуплицируем сообщения из очереди
+    external_id = Column(BigInteger, unique=True, index=True, nullable=True)
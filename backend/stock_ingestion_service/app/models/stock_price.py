@@ -1,12 +1,21 @@
-from sqlalchemy import Column, Date, Float, Integer, ForeignKey, BigInteger, String
+from sqlalchemy import Column, Date, Float, Integer, ForeignKey, BigInteger, String, Index
 from .base import Base, BaseModel
 
 class StockPrice(BaseModel, Base):
-    date = Column(Date, nullable=False, index=True)
+    # Таблица партиционирована по годам (см. миграцию d4a8c2e6f1b3), поэтому date входит в PK
+    __table_args__ = (
+        Index("ix_stockprice_date_brin", "date", postgresql_using="brin"),
+        Index("ix_stockprice_company_id_date", "company_id", "date"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+
+    # в составном PK автоинкремент нужно включить явно
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    date = Column(Date, primary_key=True, nullable=False)
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
     low = Column(Float, nullable=False)
     close = Column(Float, nullable=False)
     volume = Column(BigInteger, nullable=False)
-    company_id = Column(ForeignKey("company.id"), nullable=True, index=True)
+    company_id = Column(ForeignKey("company.id"), nullable=True)
     ticker = Column(String, nullable=True)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Date, Float, Integer, ForeignKey, BigInteger, String, UniqueConstraint
+from .base import Base, BaseModel
+
+
+class StockPriceRollupMixin:
+    """OHLCV, aggregated from stockprice per company and period by refresh_stockprice_rollups()."""
+    company_id = Column(ForeignKey("company.id"), nullable=False)
+    ticker = Column(String, nullable=True)
+    # понедельник недели или первое число месяца
+    period_start = Column(Date, nullable=False)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger, nullable=False)
+    bar_count = Column(Integer, nullable=False)
+
+
+class StockPriceWeekly(StockPriceRollupMixin, BaseModel, Base):
+    __tablename__ = "stockprice_weekly"
+    __table_args__ = (UniqueConstraint("company_id", "period_start", name="uq_stockprice_weekly_company_period"),)
+
+
+class StockPriceMonthly(StockPriceRollupMixin, BaseModel, Base):
+    __tablename__ = "stockprice_monthly"
+    __table_args__ = (UniqueConstraint("company_id", "period_start", name="uq_stockprice_monthly_company_period"),)
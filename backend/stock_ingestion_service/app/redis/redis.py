@@ -1,3 +1,4 @@
+import time
 from redis.asyncio import Redis
 from redis.exceptions import RedisError
 from fastapi import Depends
@@ -17,10 +18,20 @@ class TTLRedis(Redis):
             ex = self.default_ttl
         return await super().set(name, value, ex=ex, *args, **kwargs)
 
+
+_redis_client_instance: TTLRedis | None = None
+_redis_retry_at: float = 0.0
+
 async def get_redis_client(
     config_service: ConfigService = Depends(get_config_service)
 ) -> AsyncGenerator[Redis, None]:
-    try:
+    # один клиент (и пул соединений) на процесс, а не новое подключение на каждый запрос
+    global _redis_client_instance, _redis_retry_at
+    if _redis_client_instance is None and time.monotonic() < _redis_retry_at:
+        # Redis недавно был недоступен — не ждём таймаут подключения на каждом запросе
+        yield StubRedis()
+        return
+    if _redis_client_instance is None:
         client = TTLRedis(
             host=config_service.get("REDIS_HOST", "localhost"),
             port=int(config_service.get("REDIS_PORT", 6379)),
@@ -29,9 +40,12 @@ async def get_redis_client(
             decode_responses=True,
             default_ttl=int(config_service.get("REDIS_CACHE_EXPIRE_SECONDS", 3600)),
         )
-
-        await client.ping()
-        yield client
-        await client.aclose()
-    except RedisError:
-        yield StubRedis()
+        try:
+            await client.ping()
+        except RedisError:
+            _redis_retry_at = time.monotonic() + int(config_service.get("REDIS_RETRY_SECONDS", 30))
+            await client.aclose()
+            yield StubRedis()
+            return
+        _redis_client_instance = client
+    yield _redis_client_instance
@@ -4,7 +4,7 @@ class StubRedis:
     async def get(self, key: str):
         return None
 
-    async def set(self, key: str, value: str):
+    async def set(self, key: str, value: str, ex=None):
         pass
 
     async def delete(self, key: str):
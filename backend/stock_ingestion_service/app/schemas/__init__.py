@@ -1,4 +1,4 @@
-from .stock_data import StockResponse, MiniChartData, StocksFromRabbit
+from .stock_data import StockResponse, MiniChartData, StocksFromRabbit, HistoryBar
 from .news import NewsItem, NewsFromRabbit
 from .llm import LLMPromptRequest
 from .company import CompanySchema
\ No newline at end of file
@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Optional
 
 class LLMPromptRequest(BaseModel):
     message: str
+    temperature: Optional[float] = Field(default=None, ge=0, le=2)
+    ticker: Optional[str] = Field(default=None, description="Тикер для контекста; если не задан, ищется в тексте")
+    use_cache: bool = Field(default=True, description="False — не читать ответ из кэша")
@@ -21,3 +21,12 @@ class StocksFromRabbit(BaseModel):
     close: float
     volume: float
     ticker: str
+
+
+class HistoryBar(BaseModel):
+    date: date
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
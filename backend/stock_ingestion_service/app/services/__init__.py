@@ -1,3 +1,8 @@
 from .stock_service import StockService, get_stock_service
 from .news_service import NewsService, get_news_service
-from .rabbit_service import RabbitService, get_rabbit_service
\ No newline at end of file
+from .rabbit_service import RabbitService, get_rabbit_service
+from .partition_service import PartitionService, get_partition_service
+from .llm_service import LLMService, LLMBusyError, get_llm_service
+from .llm_cache_service import LLMCacheService, get_llm_cache_service
+from .context_pack_service import ContextPackService, get_context_pack_service
+from .price_hub import PriceHub, PriceSubscription, get_price_hub
\ No newline at end of file
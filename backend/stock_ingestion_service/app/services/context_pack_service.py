@@ -0,0 +1,166 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import Iterable
+from fastapi import Depends
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core import ConfigService, get_config_service, logger
+from ..database import DBService, get_db_service
+from ..models import Company, News, StockPrice
+
+TICKER_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9_]{1,9}")
+
+
+class ContextPackService:
+    """Precomputed per-ticker market summaries that are attached to LLM prompts.
+
+    Packs are rebuilt in the background when the consumer stores new bars or news,
+    so a chat turn only does a dict lookup.
+    """
+
+    def __init__(self, config_service: ConfigService, db_service: DBService):
+        self.db_service = db_service
+        self.token_budget = int(config_service.get("LLM_CONTEXT_TOKEN_BUDGET", 300))
+        self.price_days = int(config_service.get("LLM_CONTEXT_PRICE_DAYS", 30))
+        self.headlines = int(config_service.get("LLM_CONTEXT_HEADLINES", 5))
+        self.refresh_delay = float(config_service.get("LLM_CONTEXT_REFRESH_DELAY_SECONDS", 5))
+        self.max_tickers_per_prompt = int(config_service.get("LLM_CONTEXT_MAX_TICKERS", 3))
+
+        self.packs: dict[str, str | None] = {}  # None — данных по тикеру нет
+        self.known_tickers: dict[str, str] = {}  # upper() -> тикер как в БД
+        self.pending: set[str] = set()
+        self.refresh_task: asyncio.Task | None = None
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        # грубая оценка, ~4 символа на токен
+        return len(text) // 4 + 1
+
+    async def warm_up(self):
+        async with self.db_service.async_session_maker() as session:
+            result = await session.execute(select(Company.ticker).where(Company.is_deleted == False))
+            tickers = [row[0] for row in result.all()]
+        self.known_tickers = {t.upper(): t for t in tickers}
+        await self.refresh(tickers)
+        logger.info("Context packs built for %s tickers", sum(1 for p in self.packs.values() if p))
+
+    def schedule_refresh(self, tickers: Iterable[str]):
+        """Marks tickers as stale; a single delayed task rebuilds everything pending."""
+        self.pending.update(t for t in tickers if t)
+        if self.pending and (self.refresh_task is None or self.refresh_task.done()):
+            self.refresh_task = asyncio.create_task(self._refresh_pending())
+
+    async def _refresh_pending(self):
+        # копим тикеры несколько секунд, чтобы пачка баров давала одну пересборку;
+        # тикеры, пришедшие во время refresh(), подбираем следующим кругом
+        while self.pending:
+            await asyncio.sleep(self.refresh_delay)
+            tickers, self.pending = self.pending, set()
+            await self.refresh(tickers)
+
+    async def refresh(self, tickers: Iterable[str]):
+        async with self.db_service.async_session_maker() as session:
+            for ticker in tickers:
+                try:
+                    pack = await self.build_pack(session, ticker)
+                except Exception as e:
+                    logger.error("Failed to build context pack for %s: %s", ticker, e)
+                    await session.rollback()
+                    continue
+                self.packs[ticker] = pack
+                if pack:
+                    self.known_tickers.setdefault(ticker.upper(), ticker)
+
+    async def get_pack(self, ticker: str) -> str | None:
+        ticker = self.known_tickers.get(ticker.upper())
+        if ticker is None:
+            # неизвестный тикер из запроса — без похода в БД и без записи в кэш
+            return None
+        if ticker not in self.packs:
+            # пакет ещё не собран (например, сборка упала) — собираем один раз
+            await self.refresh([ticker])
+        return self.packs.get(ticker)
+
+    def detect_tickers(self, message: str) -> list[str]:
+        found = []
+        for token in TICKER_PATTERN.findall(message):
+            # короткие слова совпадают с тикерами только в точном регистре
+            key = token.upper() if len(token) >= 4 else token
+            ticker = self.known_tickers.get(key)
+            if ticker and ticker not in found:
+                found.append(ticker)
+            if len(found) >= self.max_tickers_per_prompt:
+                break
+        return found
+
+    async def build_pack(self, session: AsyncSession, ticker: str) -> str | None:
+        company = await session.scalar(select(Company).where(Company.ticker == ticker))
+        since = datetime.now().date() - timedelta(days=self.price_days)
+        price_filter = StockPrice.company_id == company.id if company else StockPrice.ticker == ticker
+        result = await session.execute(
+            select(StockPrice.date, StockPrice.close, StockPrice.volume)
+            .where(price_filter, StockPrice.date >= since)
+            .order_by(StockPrice.date.asc())
+        )
+        bars = result.all()
+        result = await session.execute(
+            select(News.date, News.title, News.positive, News.neutral, News.negative)
+            .where(News.ticker == ticker)
+            .order_by(desc(News.date))
+            .limit(self.headlines)
+        )
+        news = result.all()
+        if not bars and not news:
+            return None
+
+        name = company.shortname if company else ticker
+        lines = [f"{ticker} ({name})"]
+        if bars:
+            closes = [bar.close for bar in bars]
+            last = bars[-1]
+            changes = []
+            for label, back in (("1d", 1), ("5d", 5), (f"{self.price_days}d", len(closes) - 1)):
+                if len(closes) > back > 0:
+                    changes.append(f"{label} {self._pct(closes[-1 - back], last.close):+.1f}%")
+            avg_volume = sum(bar.volume for bar in bars) / len(bars)
+            lines.append(
+                f"Close {last.close:.2f} on {last.date}; {', '.join(changes) or 'no change data'}; "
+                f"range {min(closes):.2f}-{max(closes):.2f}; avg volume {avg_volume:,.0f}"
+            )
+        if news:
+            scored = [n for n in news if n.positive is not None]
+            if scored:
+                lines.append(
+                    "News sentiment (last {}): positive {:.2f}, neutral {:.2f}, negative {:.2f}".format(
+                        len(scored),
+                        sum(n.positive for n in scored) / len(scored),
+                        sum(n.neutral for n in scored) / len(scored),
+                        sum(n.negative for n in scored) / len(scored),
+                    )
+                )
+            lines.append("Headlines:")
+            for item in news:
+                headline = f"- {item.date:%Y-%m-%d}: {item.title[:120].strip()}"
+                if self.estimate_tokens("\n".join(lines + [headline])) > self.token_budget:
+                    break
+                lines.append(headline)
+
+        pack = "\n".join(lines)
+        if self.estimate_tokens(pack) > self.token_budget:
+            pack = pack[: self.token_budget * 4]
+        return pack
+
+    @staticmethod
+    def _pct(old: float, new: float) -> float:
+        return (new - old) / old * 100 if old else 0.0
+
+
+_context_pack_service_instance: ContextPackService | None = None
+
+def get_context_pack_service(config_service: ConfigService = Depends(get_config_service)) -> ContextPackService:
+    global _context_pack_service_instance
+    if _context_pack_service_instance is None:
+        _context_pack_service_instance = ContextPackService(config_service, get_db_service(config_service))
+    return _context_pack_service_instance
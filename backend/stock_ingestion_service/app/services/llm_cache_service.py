@@ -0,0 +1,94 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from fastapi import Depends
+from redis.exceptions import RedisError
+
+from ..core import ConfigService, get_config_service, logger
+
+
+class LLMCacheService:
+    """Two-tier reply cache: in-process LRU (L1) in front of Redis (L2)."""
+
+    KEY_PREFIX = "llm:reply:"
+
+    def __init__(self, config_service: ConfigService):
+        self.ttl = int(config_service.get("LLM_CACHE_TTL_SECONDS", 3600))
+        self.l1_ttl = int(config_service.get("LLM_CACHE_L1_TTL_SECONDS", 300))
+        self.l1_max_items = int(config_service.get("LLM_CACHE_L1_MAX_ITEMS", 1024))
+        self.l1: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "bypassed": 0}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split()).casefold()
+
+    def make_key(self, messages: list[dict], model: str, temperature: float) -> str:
+        normalized = [
+            {"role": m["role"], "content": self.normalize(m["content"])}
+            for m in messages
+        ]
+        raw = json.dumps(
+            {"messages": normalized, "model": model, "temperature": round(temperature, 3)},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return self.KEY_PREFIX + hashlib.sha256(raw.encode()).hexdigest()
+
+    async def get(self, key: str, redis) -> str | None:
+        entry = self.l1.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.l1.move_to_end(key)
+                self.stats["l1_hits"] += 1
+                return value
+            del self.l1[key]
+
+        try:
+            value = await redis.get(key)
+        except RedisError as e:
+            logger.warning("LLM cache read failed: %s", e)
+            value = None
+
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["l2_hits"] += 1
+        self._set_l1(key, value)
+        return value
+
+    async def set(self, key: str, value: str, redis):
+        self._set_l1(key, value)
+        try:
+            await redis.set(key, value, ex=self.ttl)
+        except RedisError as e:
+            logger.warning("LLM cache write failed: %s", e)
+
+    def mark_bypassed(self):
+        self.stats["bypassed"] += 1
+
+    def _set_l1(self, key: str, value: str):
+        self.l1[key] = (time.monotonic() + self.l1_ttl, value)
+        self.l1.move_to_end(key)
+        while len(self.l1) > self.l1_max_items:
+            self.l1.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "l1_size": len(self.l1),
+        }
+
+
+_llm_cache_service_instance: LLMCacheService | None = None
+
+def get_llm_cache_service(config_service: ConfigService = Depends(get_config_service)) -> LLMCacheService:
+    global _llm_cache_service_instance
+    if _llm_cache_service_instance is None:
+        _llm_cache_service_instance = LLMCacheService(config_service)
+    return _llm_cache_service_instance
@@ -0,0 +1,148 @@
+import asyncio
+from typing import AsyncIterator
+import openai
+from fastapi import Depends
+
+from ..core import ConfigService, get_config_service
+
+
+class OpenAIBackend:
+    def __init__(self, api_key: str):
+        self.client = openai.AsyncOpenAI(api_key=api_key)
+
+    async def complete(self, messages: list[dict], model: str, temperature: float) -> str:
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+        )
+        return response.choices[0].message.content
+
+    async def stream(self, messages: list[dict], model: str, temperature: float) -> AsyncIterator[str]:
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class StubBackend:
+    """Offline backend for load tests: replies with fixed tokens at a configurable pace."""
+
+    def __init__(self, tokens: int, token_delay: float, first_token_delay: float):
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+
+    def _reply_tokens(self, messages: list[dict]) -> list[str]:
+        prompt = messages[-1]["content"] if messages else ""
+        return [f"Stub reply to: {prompt[:40]}."] + [f" token{i}" for i in range(self.tokens - 1)]
+
+    async def complete(self, messages: list[dict], model: str, temperature: float) -> str:
+        tokens = self._reply_tokens(messages)
+        await asyncio.sleep(self.first_token_delay + self.token_delay * len(tokens))
+        return "".join(tokens)
+
+    async def stream(self, messages: list[dict], model: str, temperature: float) -> AsyncIterator[str]:
+        await asyncio.sleep(self.first_token_delay)
+        for token in self._reply_tokens(messages):
+            await asyncio.sleep(self.token_delay)
+            yield token
+
+
+class LLMBusyError(Exception):
+    pass
+
+
+class LLMSlot:
+    """One held LLM concurrency slot; release() is idempotent.
+
+    stream() releases it when the tokens end; a caller that may never start the stream
+    (a StreamingResponse whose client is already gone) must release it as well.
+    """
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self.semaphore = semaphore
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.semaphore.release()
+
+
+class LLMService:
+    def __init__(self, config_service: ConfigService):
+        self.model = config_service.get("LLM_MODEL", "gpt-4o-mini")
+        self.temperature = float(config_service.get("LLM_TEMPERATURE", 0.7))
+        self.max_concurrency = int(config_service.get("LLM_MAX_CONCURRENCY", 8))
+        self.queue_timeout = float(config_service.get("LLM_QUEUE_TIMEOUT_SECONDS", 30))
+        # не больше max_concurrency одновременных запросов к модели, остальные ждут в очереди
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        backend = config_service.get("LLM_BACKEND", "openai")
+        if backend == "stub":
+            self.backend = StubBackend(
+                tokens=int(config_service.get("LLM_STUB_TOKENS", 50)),
+                token_delay=float(config_service.get("LLM_STUB_TOKEN_DELAY_MS", 20)) / 1000,
+                first_token_delay=float(config_service.get("LLM_STUB_FIRST_TOKEN_DELAY_MS", 300)) / 1000,
+            )
+        elif backend == "openai":
+            self.backend = OpenAIBackend(api_key=config_service.get("OPEN_AI_TOKEN", ""))
+        else:
+            raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+
+    def build_messages(self, message: str, context_packs: list[str] | None = None) -> list[dict]:
+        messages = []
+        if context_packs:
+            messages.append({
+                "role": "system",
+                "content": "Актуальные рыночные данные по упомянутым тикерам:\n\n" + "\n\n".join(context_packs),
+            })
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    async def _acquire(self):
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMBusyError("Too many concurrent LLM requests, try again later")
+
+    async def reserve(self) -> LLMSlot:
+        """Takes a slot up front, so a busy server can answer 503 before a stream starts."""
+        await self._acquire()
+        return LLMSlot(self.semaphore)
+
+    async def complete(self, messages: list[dict], temperature: float | None = None) -> str:
+        await self._acquire()
+        try:
+            return await self.backend.complete(messages, self.model, self.resolve_temperature(temperature))
+        finally:
+            self.semaphore.release()
+
+    async def stream(
+        self, messages: list[dict], temperature: float | None = None, slot: LLMSlot | None = None
+    ) -> AsyncIterator[str]:
+        if slot is None:
+            slot = await self.reserve()
+        try:
+            async for token in self.backend.stream(messages, self.model, self.resolve_temperature(temperature)):
+                yield token
+        finally:
+            slot.release()
+
+    def resolve_temperature(self, temperature: float | None) -> float:
+        return self.temperature if temperature is None else temperature
+
+
+_llm_service_instance: LLMService | None = None
+
+def get_llm_service(config_service: ConfigService = Depends(get_config_service)) -> LLMService:
+    global _llm_service_instance
+    if _llm_service_instance is None:
+        _llm_service_instance = LLMService(config_service)
+    return _llm_service_instance
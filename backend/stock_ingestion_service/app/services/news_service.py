@@ -7,7 +7,7 @@ from sqlalchemy import desc
 from ..schemas.news import NewsItem
 from ..core import logger
 from ..models import News
-from ..database import get_db
+from ..database import get_read_db
 
 
 class NewsService:
@@ -26,5 +26,5 @@ class NewsService:
         news_list = result.scalars().all()
         return [NewsItem.from_orm(news) for news in news_list]
 
-def get_news_service(db: AsyncSession = Depends(get_db)) -> NewsService:
+def get_news_service(db: AsyncSession = Depends(get_read_db)) -> NewsService:
     return NewsService(db)
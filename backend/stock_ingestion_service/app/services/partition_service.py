@@ -0,0 +1,37 @@
+import asyncio
+from fastapi import Depends
+from sqlalchemy import text
+
+from ..core import ConfigService, get_config_service, logger
+from ..database import DBService, get_db_service
+
+
+class PartitionService:
+    """Keeps yearly stockprice partitions created ahead of the incoming data."""
+
+    def __init__(self, config_service: ConfigService, db_service: DBService):
+        self.db_service = db_service
+        self.years_ahead = int(config_service.get("STOCKPRICE_PARTITIONS_AHEAD", 1))
+        self.check_interval = int(config_service.get("STOCKPRICE_PARTITIONS_CHECK_SECONDS", 24 * 3600))
+
+    async def ensure_partitions(self):
+        async with self.db_service.engine.begin() as conn:
+            await conn.execute(
+                text("SELECT ensure_stockprice_partitions(:years_ahead)"),
+                {"years_ahead": self.years_ahead},
+            )
+
+    async def run(self):
+        while True:
+            try:
+                await self.ensure_partitions()
+                logger.info("stockprice partitions ensured %s year(s) ahead", self.years_ahead)
+            except Exception as e:
+                logger.error("Failed to ensure stockprice partitions: %s", e)
+            await asyncio.sleep(self.check_interval)
+
+
+def get_partition_service(
+    config_service: ConfigService = Depends(get_config_service),
+) -> PartitionService:
+    return PartitionService(config_service, get_db_service(config_service))
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from fastapi import Depends
+
+from ..core import ConfigService, get_config_service
+
+
+class PriceSubscription:
+    """One client connection: a bounded queue that drops the oldest bar when full."""
+
+    def __init__(self, tickers: set[str] | None, maxsize: int):
+        self.tickers = tickers  # None — все тикеры
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def push(self, event: str):
+        if self.queue.full():
+            # медленный клиент не должен тормозить остальных — выкидываем самое старое
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+
+class PriceHub:
+    """In-process pub/sub for freshly ingested bars, fanned out by ticker."""
+
+    def __init__(self, config_service: ConfigService):
+        self.queue_size = int(config_service.get("PRICE_STREAM_QUEUE_SIZE", 100))
+        self.max_subscribers = int(config_service.get("PRICE_STREAM_MAX_SUBSCRIBERS", 10000))
+        self.by_ticker: dict[str, set[PriceSubscription]] = {}
+        self.all_tickers: set[PriceSubscription] = set()
+        self.subscribers = 0
+        self.published = 0
+
+    def subscribe(self, tickers: set[str] | None = None) -> PriceSubscription:
+        if self.subscribers >= self.max_subscribers:
+            raise RuntimeError("Too many price stream subscribers")
+        subscription = PriceSubscription(tickers, self.queue_size)
+        if tickers is None:
+            self.all_tickers.add(subscription)
+        else:
+            for ticker in tickers:
+                self.by_ticker.setdefault(ticker, set()).add(subscription)
+        self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: PriceSubscription):
+        if subscription.tickers is None:
+            self.all_tickers.discard(subscription)
+        else:
+            for ticker in subscription.tickers:
+                subscribers = self.by_ticker.get(ticker)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.by_ticker[ticker]
+        self.subscribers -= 1
+
+    def publish(self, ticker: str, bar: dict):
+        # сериализуем один раз, всем подписчикам уходит одна и та же строка
+        event = json.dumps({"ticker": ticker, **bar}, default=str)
+        for subscription in self.by_ticker.get(ticker, ()):
+            subscription.push(event)
+        for subscription in self.all_tickers:
+            subscription.push(event)
+        self.published += 1
+
+    def get_stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "tickers": len(self.by_ticker),
+            "published": self.published,
+        }
+
+
+_price_hub_instance: PriceHub | None = None
+
+def get_price_hub(config_service: ConfigService = Depends(get_config_service)) -> PriceHub:
+    global _price_hub_instance
+    if _price_hub_instance is None:
+        _price_hub_instance = PriceHub(config_service)
+    return _price_hub_instance
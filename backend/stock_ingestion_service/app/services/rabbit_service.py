@@ -3,7 +3,9 @@ import aio_pika
 import asyncio
 import json
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -12,6 +14,8 @@ from ..models import News, StockPrice, Company
 from ..schemas import NewsFromRabbit, StocksFromRabbit
 from ..database import get_db_service
 from ..core import ConfigService, get_config_service
+from .context_pack_service import get_context_pack_service
+from .price_hub import get_price_hub
 
 class RabbitService:
     def __init__(self, config_service: ConfigService):
@@ -21,11 +25,28 @@ class RabbitService:
         self.password = config_service.get("RABBIT_PASSWORD")
         self.queue1_name = config_service.get("RABBIT_NEWS_QUEUE")
         self.queue2_name = config_service.get("RABBIT_STOCKS_QUEUE")
-        
+        self.prefetch_count = int(config_service.get("RABBIT_PREFETCH_COUNT", 10))
+        self.news_batch_size = int(config_service.get("RABBIT_NEWS_BATCH_SIZE", self.prefetch_count))
+        # RABBIT_NEWS_FLUSH_SECONDS — старое имя, когда пачками писались только новости
+        self.flush_interval = float(
+            config_service.get("RABBIT_FLUSH_SECONDS", config_service.get("RABBIT_NEWS_FLUSH_SECONDS", 1.0))
+        )
+        self.price_batch_size = int(config_service.get("RABBIT_PRICE_BATCH_SIZE", self.prefetch_count))
+
         self.connection: aio_pika.RobustConnection | None = None
         self.channel: aio_pika.Channel | None = None
         self.should_stop = asyncio.Event()
         self.db_service = get_db_service(config_service)
+        self.context_pack_service = get_context_pack_service(config_service)
+        self.price_hub = get_price_hub(config_service)
+
+        self.news_buffer: list[tuple[aio_pika.IncomingMessage, NewsFromRabbit, datetime]] = []
+        self.news_lock = asyncio.Lock()
+        self.price_buffer: list[tuple[aio_pika.IncomingMessage, StocksFromRabbit]] = []
+        self.price_lock = asyncio.Lock()
+        # годы, для которых партиция stockprice точно есть, — чтобы не звать create на каждую пачку
+        self.partition_years: set[int] = set()
+        self.flush_task: asyncio.Task | None = None
 
     async def connect(self):
         retries = 0
@@ -45,82 +66,251 @@ class RabbitService:
                 print(f"❌ RabbitMQ connection failed (retry {retries}): {e}")
                 await asyncio.sleep(2 ** retries)
 
-    # async def process_queue1_message(self, message: aio_pika.IncomingMessage):
-    #     # async with message.process():
-    #         try:
-    #             payload = json.loads(message.body)
-    #             data = NewsFromRabbit(**payload)
-    #             async with self.db_service.async_session_maker() as session:
-    #                 news = News(
-    #                     ticker=data.ticker,
-    #                     date=datetime.fromisoformat(data.create_datetime),  # преобразуем ISO-строку в datetime
-    #                     title=data.subject,
-    #                     content=data.body,
-    #                     source="KASE",  # или другой источник, если есть
-    #                     important=data.is_important,
-    #                     neutral=data.sentiment_probs.neutral,
-    #                     positive=data.sentiment_probs.positive,
-    #                     negative=data.sentiment_probs.negative,
-    #                 )
-    #                 session.add(news)
-    #                 #await session.commit()
-    #             print(f"✅ Processed message from {self.queue1_name}")
-    #         except Exception as e:
-    #             print(f"❌ Failed to process message from {self.queue1_name}: {e}")
+    async def process_queue1_message(self, message: aio_pika.IncomingMessage):
+        try:
+            payload = json.loads(message.body)
+            data = NewsFromRabbit(**payload)
+            published_at = self._parse_news_datetime(data.create_datetime)
+        except Exception as e:
+            # битое сообщение не вернётся валидным — подтверждаем и выкидываем, как в очереди цен
+            print(f"❌ Invalid message from {self.queue1_name}: {e}")
+            await message.ack()
+            return
 
-    async def process_queue2_message(self, message: aio_pika.IncomingMessage):
-        async with message.process():
+        async with self.news_lock:
+            self.news_buffer.append((message, data, published_at))
+            if len(self.news_buffer) >= self.news_batch_size:
+                await self._flush_news_buffer()
+
+    async def flush_news(self):
+        async with self.news_lock:
+            await self._flush_news_buffer()
+
+    async def _flush_news_buffer(self):
+        """Writes buffered news in one INSERT, skipping KASE ids that are already stored."""
+        if not self.news_buffer:
+            return
+        batch, self.news_buffer = self.news_buffer, []
+
+        # внутри пачки тоже могут быть повторы, оставляем последний
+        rows, messages = {}, {}
+        for message, data, published_at in batch:
+            rows[data.id] = {
+                "external_id": data.id,
+                "ticker": data.ticker,
+                "date": published_at,
+                "title": data.subject,
+                "content": data.body,
+                "source": "KASE",
+                "important": data.is_important,
+                "neutral": data.sentiment_probs.neutral,
+                "positive": data.sentiment_probs.positive,
+                "negative": data.sentiment_probs.negative,
+                "is_deleted": False,
+            }
+            messages.setdefault(data.id, []).append(message)
+
+        async def store(news_rows: list[dict]) -> int:
+            async with self.db_service.async_session_maker() as session:
+                result = await session.execute(
+                    pg_insert(News)
+                    .values(news_rows)
+                    .on_conflict_do_nothing(index_elements=[News.external_id])
+                )
+                await session.commit()
+            return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(news_rows)
+
+        stored, inserted = await self._store_batch(
+            self.queue1_name, [(messages[key], row) for key, row in rows.items()], store
+        )
+        if not stored:
+            return
+        self.context_pack_service.schedule_refresh({row["ticker"] for row in stored})
+        print(f"✅ Stored {inserted} news from {self.queue1_name} ({len(stored) - inserted} duplicates skipped)")
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Connection-level failures are worth a redelivery; anything else would fail again."""
+        if isinstance(error, DBAPIError) and error.connection_invalidated:
+            return True
+        return isinstance(error, (OperationalError, InterfaceError, ConnectionError, OSError, asyncio.TimeoutError))
+
+    async def _store_batch(self, queue_name: str, items: list, store) -> tuple[list, int]:
+        """Runs store() for the whole batch, falling back to one item per transaction on failure.
+
+        items are (messages, payload) pairs; store(payloads) writes them in one transaction
+        and returns a row count. Returns the payloads that were stored and the summed count.
+        Items that still fail on their own are rejected without requeue (dead-lettered if the
+        queue has a DLX), so one bad message cannot block the queue; only connection errors
+        put messages back.
+        """
+        try:
+            count = await store([payload for _, payload in items])
+        except Exception as e:
+            if self._is_transient(e):
+                print(f"❌ Database unavailable, requeueing batch from {queue_name}: {e}")
+                for messages, _ in items:
+                    for message in messages:
+                        await message.nack(requeue=True)
+                return [], 0
+            print(f"⚠️ Batch from {queue_name} failed ({e}), retrying one by one")
+        else:
+            for messages, _ in items:
+                for message in messages:
+                    await message.ack()
+            return [payload for _, payload in items], count
+
+        stored, count = [], 0
+        for i, (messages, payload) in enumerate(items):
             try:
-                payload = json.loads(message.body)
-                data = StocksFromRabbit(**payload)
-                async with self.db_service.async_session_maker() as session:
-                    company = await session.scalar(
-                        select(Company).where(Company.ticker == data.ticker)
+                count += await store([payload])
+            except Exception as e:
+                if self._is_transient(e):
+                    print(f"❌ Database unavailable, requeueing the rest of the batch from {queue_name}: {e}")
+                    for rest, _ in items[i:]:
+                        for message in rest:
+                            await message.nack(requeue=True)
+                    break
+                print(f"❌ Dropping message from {queue_name}: {e}")
+                for message in messages:
+                    await message.reject(requeue=False)
+                continue
+            for message in messages:
+                await message.ack()
+            stored.append(payload)
+        return stored, count
+
+    async def _flush_loop(self):
+        while not self.should_stop.is_set():
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_news()
+            await self.flush_prices()
+
+    @staticmethod
+    def _parse_news_datetime(value: str) -> datetime:
+        # колонка date без таймзоны, поэтому оставляем время как есть и убираем tzinfo
+        parsed = datetime.fromisoformat(value)
+        return parsed.replace(tzinfo=None) if parsed.tzinfo else parsed
+
+    async def process_queue2_message(self, message: aio_pika.IncomingMessage):
+        try:
+            payload = json.loads(message.body)
+            data = StocksFromRabbit(**payload)
+        except Exception as e:
+            print(f"❌ Invalid message from {self.queue2_name}: {e}")
+            await message.ack()
+            return
+
+        async with self.price_lock:
+            self.price_buffer.append((message, data))
+            if len(self.price_buffer) >= self.price_batch_size:
+                await self._flush_price_buffer()
+
+    async def flush_prices(self):
+        async with self.price_lock:
+            await self._flush_price_buffer()
+
+    async def _flush_price_buffer(self):
+        """Resolves companies for the whole batch in one SELECT and writes the bars in one INSERT."""
+        if not self.price_buffer:
+            return
+        batch, self.price_buffer = self.price_buffer, []
+
+        async def store(bars: list[StocksFromRabbit]) -> int:
+            tickers = {data.ticker for data in bars}
+            async with self.db_service.async_session_maker() as session:
+                result = await session.execute(
+                    select(Company.ticker, Company.id).where(Company.ticker.in_(tickers))
+                )
+                company_ids = dict(result.all())
+                for ticker in tickers - company_ids.keys():
+                    print(f"⚠️ Company with ticker {ticker} not found")
+                rows = [
+                    {
+                        "date": data.date,
+                        "open": data.open,
+                        "high": data.high,
+                        "low": data.low,
+                        "close": data.close,
+                        # в схеме очереди volume float, колонка BIGINT
+                        "volume": int(data.volume),
+                        "company_id": company_ids.get(data.ticker),
+                        "ticker": data.ticker,
+                        "is_deleted": False,
+                    }
+                    for data in bars
+                ]
+                # бар из прошлого (догрузка истории) не должен падать на отсутствующей партиции
+                years = {row["date"].year for row in rows} - self.partition_years
+                if years:
+                    await session.execute(
+                        text("SELECT create_stockprice_partition(y) FROM unnest(CAST(:years AS INTEGER[])) AS y"),
+                        {"years": sorted(years)},
+                    )
+                await session.execute(pg_insert(StockPrice).values(rows))
+                windows: dict[int, tuple] = {}
+                for row in rows:
+                    if row["company_id"] is None:
+                        continue
+                    date_from, date_to = windows.get(row["company_id"], (row["date"], row["date"]))
+                    windows[row["company_id"]] = (min(date_from, row["date"]), max(date_to, row["date"]))
+                if windows:
+                    # недельные/месячные свечи пересчитываются вместе с дневными, в одной транзакции;
+                    # окно у каждой компании своё, чтобы старый бар одной не пересчитывал годы всем остальным
+                    company_ids = sorted(windows)
+                    await session.execute(
+                        text(
+                            "SELECT refresh_stockprice_rollups(ARRAY[w.company_id], w.date_from, w.date_to) "
+                            "FROM unnest(CAST(:company_ids AS INTEGER[]), CAST(:dates_from AS DATE[]), "
+                            "CAST(:dates_to AS DATE[])) AS w(company_id, date_from, date_to)"
+                        ),
+                        {
+                            "company_ids": company_ids,
+                            "dates_from": [windows[company_id][0] for company_id in company_ids],
+                            "dates_to": [windows[company_id][1] for company_id in company_ids],
+                        },
                     )
+                await session.commit()
+            self.partition_years |= years
+            return len(rows)
 
-                    if not company:
-                        print(f"⚠️ Company with ticker {data.ticker} not found")
-                        price = StockPrice(
-                            date=data.date,
-                            open=data.open,
-                            high=data.high,
-                            low=data.low,
-                            close=data.close,
-                            volume=data.volume,
-                            company_id=None,
-                            ticker=data.ticker
-                        )
-                    else:
-                        price = StockPrice(
-                            date=data.date,
-                            open=data.open,
-                            high=data.high,
-                            low=data.low,
-                            close=data.close,
-                            volume=data.volume,
-                            company_id=company.id,
-                            ticker=data.ticker
-                        )
-                    session.add(price)
-                    await session.commit()
-                print(f"✅ Processed message from {self.queue2_name}")
-            except Exception as e:
-                print(f"❌ Failed to process message from {self.queue2_name}: {e}")
+        stored, _ = await self._store_batch(self.queue2_name, [([message], data) for message, data in batch], store)
+        if not stored:
+            return
+        # подписчики получают только записанные бары, то есть с задержкой до RABBIT_FLUSH_SECONDS
+        for data in stored:
+            self.price_hub.publish(data.ticker, {
+                "date": data.date,
+                "open": data.open,
+                "high": data.high,
+                "low": data.low,
+                "close": data.close,
+                "volume": data.volume,
+            })
+        self.context_pack_service.schedule_refresh({data.ticker for data in stored})
+        print(f"✅ Stored {len(stored)} prices from {self.queue2_name}")
 
     async def start_consumers(self):
         await self.connect()
-        await self.channel.set_qos(prefetch_count=10)  # 🔥 вот сюда prefetch!
+        await self.channel.set_qos(prefetch_count=self.prefetch_count)  # 🔥 вот сюда prefetch!
 
-        # queue1 = await self.channel.declare_queue(self.queue1_name, durable=True)
+        queue1 = await self.channel.declare_queue(self.queue1_name, durable=True)
         queue2 = await self.channel.declare_queue(self.queue2_name, durable=True)
 
-        # await queue1.consume(self.process_queue1_message)
+        # неполные пачки дописываем по таймеру, иначе они ждали бы следующих сообщений
+        self.flush_task = asyncio.create_task(self._flush_loop())
+        await queue1.consume(self.process_queue1_message)
         await queue2.consume(self.process_queue2_message)
 
         print(f"📥 Consumers started for queues: {self.queue1_name}, {self.queue2_name}")
 
     async def stop(self):
         self.should_stop.set()
+        if self.flush_task:
+            self.flush_task.cancel()
+        # подтверждаем то, что уже в буфере, пока канал ещё открыт
+        await self.flush_news()
+        await self.flush_prices()
         if self.connection and not self.connection.is_closed:
             await self.connection.close()
             print("🔌 RabbitMQ connection closed")
@@ -5,8 +5,8 @@ from sqlalchemy.future import select
 from sqlalchemy.sql import func
 
 from ..schemas import StockResponse, MiniChartData
-from ..database import get_db
-from ..models import Company, StockPrice
+from ..database import get_read_db
+from ..models import Company, StockPrice, StockPriceWeekly, StockPriceMonthly
 
 
 class StockService:
@@ -94,7 +94,8 @@ class StockService:
         result = await self.db.execute(stmt)
         return result.scalars().all()
 
-    async def process_stock_data(self, price_data: list[StockPrice], company_data: list[Company], company_ids: list[int]) -> list[StockResponse]:
+    def build_stock_payload(self, price_data: list[StockPrice], company_data: list[Company], company_ids: list[int]) -> list[dict]:
+        """Same data as process_stock_data, as plain dicts for the fast JSON path."""
         # Create company lookup dictionary
         company_dict = {c.id: c for c in company_data}
         
@@ -117,29 +118,38 @@ class StockService:
                 continue
 
             mini_chart_data = [
-                MiniChartData(date=str(price.date), value=round(price.close, 2))
+                {"date": str(price.date), "value": round(price.close, 2)}
                 for price in ticker_prices
             ]
             current_price = ticker_prices[-1].close
-            first_price = ticker_prices[-2].close
+            # у только что добавленного тикера может быть всего один бар
+            first_price = ticker_prices[-2].close if len(ticker_prices) > 1 else current_price
             share_change = round((current_price - first_price) / current_price * 100, 2)
 
-            result.append(StockResponse(
-                logoUrl=company.image_url or "https://via.placeholder.com/32",
-                companyName=company.shortname or company.ticker,
-                ticker=company.ticker,
-                shareChange=share_change,
-                currentPrice=round(current_price, 2),
-                priceData=mini_chart_data
-            ))
+            result.append({
+                "logoUrl": company.image_url or "https://via.placeholder.com/32",
+                "companyName": company.shortname or company.ticker,
+                "ticker": company.ticker,
+                "shareChange": share_change,
+                "currentPrice": round(current_price, 2),
+                "priceData": mini_chart_data,
+            })
         return result
 
-    async def get_popular_stocks(self) -> list[StockResponse]:
+    async def process_stock_data(self, price_data: list[StockPrice], company_data: list[Company], company_ids: list[int]) -> list[StockResponse]:
+        return [
+            StockResponse(**item)
+            for item in self.build_stock_payload(price_data, company_data, company_ids)
+        ]
+
+    async def get_popular_stocks(self, as_dict: bool = False) -> list[StockResponse] | list[dict]:
         top_company_ids = await self.fetch_top_tickers()
         if not top_company_ids:
             return []
         price_data = await self.fetch_price_data(top_company_ids, days=30)
         company_data = await self.fetch_company_info(top_company_ids)
+        if as_dict:
+            return self.build_stock_payload(price_data, company_data, top_company_ids)
         return await self.process_stock_data(price_data, company_data, top_company_ids)
 
     async def fetch_top_moves(self, days: int = 20) -> list[int]:
@@ -183,13 +193,15 @@ class StockService:
 
         return [company_id[0] for company_id in sorted_changes[:5]]
 
-    async def get_top_moves(self) -> list[StockResponse]:
+    async def get_top_moves(self, as_dict: bool = False) -> list[StockResponse] | list[dict]:
         company_ids = await self.fetch_top_moves()
         if not company_ids:
             return []
         print(company_ids)
         price_data = await self.fetch_price_data(company_ids, days=30)
         company_data = await self.fetch_company_info(company_ids)
+        if as_dict:
+            return self.build_stock_payload(price_data, company_data, company_ids)
         return await self.process_stock_data(price_data, company_data, company_ids)
     
     async def fetch_company_info_by_ticker(self, ticker: str) -> list[Company]:
@@ -197,6 +209,56 @@ class StockService:
         result = await self.db.execute(stmt)
         return result.scalars().all()
 
+    async def fetch_companies_by_tickers(self, tickers: list[str]) -> list[Company]:
+        # тикеры KASE бывают в смешанном регистре, поэтому ищем и как есть, и в upper()
+        variants = set(tickers) | {t.upper() for t in tickers}
+        stmt = select(Company).where(Company.ticker.in_(variants))
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
+
+    async def get_quotes(self, tickers: list[str], days: int = 30, as_dict: bool = False) -> list[StockResponse] | list[dict]:
+        """Price, change and mini-chart for many tickers: one query for companies, one for bars."""
+        company_data = await self.fetch_companies_by_tickers(tickers)
+        if not company_data:
+            return []
+        company_ids = [c.id for c in company_data]
+        price_data = await self.fetch_price_data(company_ids, days=days)
+        if as_dict:
+            return self.build_stock_payload(price_data, company_data, company_ids)
+        return await self.process_stock_data(price_data, company_data, company_ids)
+
+    async def fetch_history(self, company_id: int, interval: str = "day", years: int = 1) -> list[dict]:
+        """OHLCV bars for the last `years`; week/month are read from the rollup tables."""
+        since = datetime.now().date() - timedelta(days=365 * years)
+        if interval == "day":
+            stmt = (
+                select(StockPrice.date, StockPrice.open, StockPrice.high, StockPrice.low,
+                       StockPrice.close, StockPrice.volume)
+                .where(StockPrice.company_id == company_id, StockPrice.date >= since,
+                       StockPrice.is_deleted.is_(False))
+                .order_by(StockPrice.date.asc())
+            )
+        else:
+            model = StockPriceWeekly if interval == "week" else StockPriceMonthly
+            stmt = (
+                select(model.period_start.label("date"), model.open, model.high, model.low,
+                       model.close, model.volume)
+                .where(model.company_id == company_id, model.period_start >= since)
+                .order_by(model.period_start.asc())
+            )
+        result = await self.db.execute(stmt)
+        return [
+            {
+                "date": row.date,
+                "open": row.open,
+                "high": row.high,
+                "low": row.low,
+                "close": row.close,
+                "volume": row.volume or 0,
+            }
+            for row in result.all()
+        ]
+
 
-def get_stock_service(db: AsyncSession = Depends(get_db)) -> StockService:
+def get_stock_service(db: AsyncSession = Depends(get_read_db)) -> StockService:
     return StockService(db)
\ No newline at end of file
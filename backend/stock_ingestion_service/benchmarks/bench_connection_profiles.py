@@ -0,0 +1,89 @@
+"""StockService query latency with DB_CONNECTION_PROFILE=pgbouncer-transaction vs direct.
+
+Needs DATABASE_URL pointing straight at Postgres (not through PgBouncer in transaction
+mode — the direct profile keeps server-side prepared statements). Each profile gets its
+own engine; every query runs --iterations times from --concurrency concurrent sessions.
+
+    python -m benchmarks.bench_connection_profiles --iterations 300 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.stats import summarize
+
+
+def build_db_service(profile: str):
+    os.environ["DB_CONNECTION_PROFILE"] = profile
+    from app.core import ConfigService
+    from app.database import DBService
+
+    return DBService(ConfigService())
+
+
+def make_queries(ticker: str):
+    """(name, coroutine factory) pairs; each factory takes a StockService."""
+    return [
+        ("fetch_top_tickers", lambda s: s.fetch_top_tickers()),
+        ("fetch_top_moves", lambda s: s.fetch_top_moves()),
+        ("fetch_price_data", lambda s: s.fetch_price_data([1, 2, 3, 4, 5])),
+        ("fetch_company_info", lambda s: s.fetch_company_info([1, 2, 3, 4, 5])),
+        ("fetch_company_info_by_ticker", lambda s: s.fetch_company_info_by_ticker(ticker)),
+    ]
+
+
+async def run_query(db_service, factory, iterations: int, concurrency: int) -> dict:
+    from app.services import StockService
+
+    latencies: list[float] = []
+    per_worker = max(1, iterations // concurrency)
+
+    async def worker():
+        async with db_service.async_session_maker() as session:
+            service = StockService(session)
+            for _ in range(per_worker):
+                started = time.perf_counter()
+                await factory(service)
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def run_profile(profile: str, args) -> dict:
+    db_service = build_db_service(profile)
+    results = {}
+    try:
+        for name, factory in make_queries(args.ticker):
+            await run_query(db_service, factory, args.concurrency * 5, args.concurrency)  # прогрев
+            results[name] = await run_query(db_service, factory, args.iterations, args.concurrency)
+    finally:
+        await db_service.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ticker", default="AAPL")
+    args = parser.parse_args()
+    if not os.environ.get("DATABASE_URL"):
+        parser.error("DATABASE_URL is not set")
+
+    results = {profile: asyncio.run(run_profile(profile, args)) for profile in ("pgbouncer-transaction", "direct")}
+
+    print(f"{'query':<30} {'profile':<22} {'qps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, _ in make_queries(args.ticker):
+        for profile, stats in results.items():
+            s = stats[name]
+            print(f"{name:<30} {profile:<22} {s['rps']:8.1f} {s['p50_ms']:8.2f} {s['p95_ms']:8.2f} {s['p99_ms']:8.2f}")
+        base, direct = results["pgbouncer-transaction"][name]["p50_ms"], results["direct"][name]["p50_ms"]
+        if base:
+            print(f"{'':<30} p50 change with direct: {(direct / base - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""RabbitMQ consumer throughput with an in-memory broker (benchmarks.fake_amqp).
+
+Floods RabbitService.process_queue2_message (prices) or process_queue1_message (news)
+with synthetic payloads for every combination of --prefetch and --batch. It reports
+messages/s, DB statements and transactions per message (from DBService.metrics), and
+ack latency (delivery -> ack) p50/p95/p99. Writes go to the real DATABASE_URL; rows
+inserted by a run are deleted afterwards unless --keep is given.
+
+    python -m benchmarks.bench_consumers --queue prices --messages 5000 --prefetch 1 10 50 --batch 1 10 50
+
+A batch larger than prefetch can only be filled by the RABBIT_FLUSH_SECONDS timer, and
+the results show that stall.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import time
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from benchmarks.fake_amqp import FakeConnection
+from benchmarks.stats import summarize
+
+os.environ.setdefault("RABBIT_HOST", "fake")
+os.environ.setdefault("RABBIT_PORT", "5672")
+os.environ.setdefault("RABBIT_NEWS_QUEUE", "news")
+os.environ.setdefault("RABBIT_STOCKS_QUEUE", "stocks")
+# пересборка context packs в бенчмарке не нужна и только шумит запросами
+os.environ.setdefault("LLM_CONTEXT_REFRESH_DELAY_SECONDS", "3600")
+
+TABLES = {"prices": "stockprice", "news": "news"}
+
+
+def price_payloads(count: int, tickers: list[str], rng: random.Random):
+    today = date.today().isoformat()
+    for _ in range(count):
+        close = rng.uniform(5, 500)
+        yield json.dumps({
+            "ticker": rng.choice(tickers),
+            "date": today,
+            "open": close,
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.randint(1_000, 1_000_000),
+        }).encode()
+
+
+def news_payloads(count: int, tickers: list[str], rng: random.Random):
+    # external_id уникален в таблице, поэтому берём диапазон от текущего времени
+    first_id = int(time.time() * 1000) * 1000
+    created = datetime.now().isoformat()
+    for i in range(count):
+        yield json.dumps({
+            "ticker": rng.choice(tickers),
+            "id": first_id + i,
+            "create_datetime": created,
+            "language": "ru",
+            "subject": "Benchmark news",
+            "body": "Synthetic body",
+            "is_important": False,
+            "sentiment_probs": {"neutral": 0.5, "positive": 0.3, "negative": 0.2},
+        }).encode()
+
+
+def db_counters(metrics) -> tuple[int, int]:
+    with metrics.lock:
+        statements = sum(histogram.count for histogram in metrics.queries.values())
+    return statements, metrics.commits
+
+
+async def run_case(args, tickers: list[str], prefetch: int, batch: int) -> dict:
+    os.environ["RABBIT_PREFETCH_COUNT"] = str(prefetch)
+    os.environ["RABBIT_PRICE_BATCH_SIZE"] = str(batch)
+    os.environ["RABBIT_NEWS_BATCH_SIZE"] = str(batch)
+    os.environ["RABBIT_FLUSH_SECONDS"] = str(args.flush_seconds)
+    from app.core import ConfigService
+    from app.services import RabbitService
+
+    config = ConfigService()
+    service = RabbitService(config)
+    connection = FakeConnection()
+
+    async def connect():
+        service.connection = connection
+        service.channel = await connection.channel()
+
+    service.connect = connect
+    table = TABLES[args.queue]
+    async with service.db_service.async_session_maker() as session:
+        max_id = await session.scalar(text(f"SELECT coalesce(max(id), 0) FROM {table}"))
+
+    rng = random.Random(args.seed)
+    make_payloads = price_payloads if args.queue == "prices" else news_payloads
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        await service.start_consumers()
+        queue_name = service.queue2_name if args.queue == "prices" else service.queue1_name
+        queue = service.channel.queues[queue_name]
+        statements_before, commits_before = db_counters(service.db_service.metrics)
+
+        started = time.perf_counter()
+        for body in make_payloads(args.messages, tickers, rng):
+            queue.publish(body)
+        await asyncio.wait_for(queue.drained.wait(), timeout=args.timeout)
+        elapsed = time.perf_counter() - started
+
+        statements_after, commits_after = db_counters(service.db_service.metrics)
+        await service.stop()
+
+    if not args.keep:
+        async with service.db_service.async_session_maker() as session:
+            await session.execute(text(f"DELETE FROM {table} WHERE id > :max_id"), {"max_id": max_id})
+            await session.commit()
+
+    latency = summarize(queue.ack_latencies, elapsed)
+    statements = statements_after - statements_before
+    transactions = commits_after - commits_before
+    return {
+        "prefetch": prefetch,
+        "batch": batch,
+        "msgs_per_s": args.messages / elapsed,
+        "statements_per_msg": statements / args.messages,
+        "transactions_per_msg": transactions / args.messages,
+        # BEGIN и COMMIT — тоже обращения к базе
+        "round_trips_per_msg": (statements + 2 * transactions) / args.messages,
+        "ack_p50_ms": latency["p50_ms"],
+        "ack_p95_ms": latency["p95_ms"],
+        "ack_p99_ms": latency["p99_ms"],
+        "redeliveries": queue.redeliveries,
+        "errors": log.getvalue().count("❌"),
+    }
+
+
+async def load_tickers(limit: int) -> list[str]:
+    from app.core import ConfigService
+    from app.database import get_db_service
+
+    db_service = get_db_service(ConfigService())
+    async with db_service.async_session_maker() as session:
+        result = await session.execute(text("SELECT ticker FROM company ORDER BY id LIMIT :limit"), {"limit": limit})
+        tickers = list(result.scalars())
+    if not tickers:
+        raise RuntimeError("No companies in the database, run benchmarks.synthetic_market first")
+    return tickers
+
+
+async def run(args) -> list[dict]:
+    tickers = await load_tickers(args.tickers)
+    results = []
+    for prefetch in args.prefetch:
+        for batch in args.batch:
+            result = await run_case(args, tickers, prefetch, batch)
+            results.append(result)
+            print(
+                f"{prefetch:>8} {batch:>6} {result['msgs_per_s']:9.1f} {result['round_trips_per_msg']:9.2f} "
+                f"{result['statements_per_msg']:8.2f} {result['transactions_per_msg']:8.3f} "
+                f"{result['ack_p50_ms']:8.2f} {result['ack_p95_ms']:8.2f} {result['ack_p99_ms']:8.2f} "
+                f"{result['redeliveries']:6d} {result['errors']:6d}"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue", choices=TABLES, default="prices")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--tickers", type=int, default=50)
+    parser.add_argument("--prefetch", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--flush-seconds", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep inserted rows")
+    parser.add_argument("--json", help="also write raw results to this file")
+    args = parser.parse_args()
+    if not os.environ.get("DATABASE_URL"):
+        parser.error("DATABASE_URL is not set")
+
+    print(f"{args.queue}: {args.messages} messages over {args.tickers} tickers")
+    print(
+        f"{'prefetch':>8} {'batch':>6} {'msg/s':>9} {'trips/msg':>9} {'stmt/msg':>8} {'tx/msg':>8} "
+        f"{'ack p50':>8} {'ack p95':>8} {'ack p99':>8} {'redel':>6} {'errors':>6}"
+    )
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
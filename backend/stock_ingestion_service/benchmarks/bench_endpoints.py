@@ -0,0 +1,145 @@
+"""Throughput and latency of the stock service read endpoints over HTTP.
+
+Start the service against a database filled by benchmarks.synthetic_market, then:
+
+    python -m benchmarks.bench_endpoints --base-url http://localhost:8002 --duration 20 --concurrency 16
+    python -m benchmarks.bench_endpoints --save baseline.json
+    python -m benchmarks.bench_endpoints --compare baseline.json --threshold 15
+
+Each endpoint is driven separately by --concurrency closed-loop clients for --duration
+seconds after a short warm-up. With --compare the run exits with code 1 when the p95 or
+throughput of any endpoint is worse than the baseline by more than --threshold percent.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+
+import httpx
+
+from benchmarks.stats import summarize
+
+
+def make_endpoints(tickers: list[str]):
+    """name -> function returning the next request path."""
+    return {
+        "popular": lambda: "/stocks/popular",
+        "top-movers": lambda: "/stocks/top-movers",
+        "by-ticker": lambda: f"/stocks/by-ticker/{random.choice(tickers)}",
+        "news": lambda: f"/news/?limit=10&offset={random.randint(0, 200)}",
+        "companies": lambda: "/companies/",
+    }
+
+
+async def load_tickers(client: httpx.AsyncClient, sample: int) -> list[str]:
+    response = await client.get("/companies/")
+    response.raise_for_status()
+    tickers = [company["ticker"] for company in response.json()]
+    if not tickers:
+        raise RuntimeError("No companies in the database, run benchmarks.synthetic_market first")
+    return random.sample(tickers, min(sample, len(tickers)))
+
+
+async def drive(client: httpx.AsyncClient, next_path, duration: float, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(next_path())
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["errors"] = errors
+    return result
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        tickers = await load_tickers(client, args.ticker_sample)
+        endpoints = make_endpoints(tickers)
+        selected = args.endpoints or list(endpoints)
+        results = {}
+        for name in selected:
+            await drive(client, endpoints[name], args.warmup, args.concurrency)  # прогрев
+            results[name] = await drive(client, endpoints[name], args.duration, args.concurrency)
+            print_row(name, results[name])
+    return results
+
+
+def print_row(name: str, stats: dict):
+    print(
+        f"{name:<12} {stats['rps']:9.1f} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} "
+        f"{stats['p99_ms']:9.2f} {stats['count']:8d} {stats['errors']:7d}"
+    )
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + threshold / 100):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f} -> {stats['p95_ms']:.2f} ms")
+        if base["rps"] and stats["rps"] < base["rps"] * (1 - threshold / 100):
+            regressions.append(f"{name}: throughput {base['rps']:.1f} -> {stats['rps']:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--ticker-sample", type=int, default=200, help="tickers used for /stocks/by-ticker")
+    parser.add_argument("--endpoints", nargs="*", choices=list(make_endpoints(["X"])))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON written by --save")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed regression, percent")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    random.seed(args.seed)
+
+    print(f"{args.base_url}, concurrency {args.concurrency}, {args.duration:.0f}s per endpoint")
+    print(f"{'endpoint':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'count':>8} {'errors':>7}")
+    results = asyncio.run(run(args))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Regressions over {args.threshold:.0f}%:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"✅ No regressions over {args.threshold:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
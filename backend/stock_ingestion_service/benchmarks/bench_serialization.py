@@ -0,0 +1,91 @@
+"""CPU cost per request of the stock endpoints: pydantic response_model vs orjson fast path.
+
+Runs the real StockController through ASGI with StockService's DB calls replaced by
+in-memory rows, so only routing, response building and serialization are measured.
+
+    python -m benchmarks.bench_serialization --requests 2000 --cards 5 --points 30
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+
+def make_rows(cards: int, points: int):
+    companies = [
+        SimpleNamespace(id=i, ticker=f"TCK{i}", shortname=f"Company {i}", image_url=None)
+        for i in range(1, cards + 1)
+    ]
+    start = date.today() - timedelta(days=points)
+    prices = [
+        SimpleNamespace(company_id=c.id, date=start + timedelta(days=d), close=100 + c.id + d * 0.37)
+        for c in companies
+        for d in range(points)
+    ]
+    return companies, prices
+
+
+def build_app(fast_json: bool, cards: int, points: int) -> FastAPI:
+    os.environ["STOCK_FAST_JSON"] = "true" if fast_json else "false"
+    from app.controllers import StockController
+    from app.services import StockService, get_stock_service
+
+    companies, prices = make_rows(cards, points)
+    company_ids = [c.id for c in companies]
+
+    class InMemoryStockService(StockService):
+        async def fetch_top_tickers(self, days: int = 7):
+            return company_ids
+
+        async def fetch_price_data(self, company_ids, days: int = 14):
+            return prices
+
+        async def fetch_company_info(self, company_ids):
+            return companies
+
+    app = FastAPI()
+    app.include_router(StockController().get_router())
+    app.dependency_overrides[get_stock_service] = lambda: InMemoryStockService(db=None)
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> tuple[float, float, int]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):  # прогрев
+            await client.get("/stocks/popular")
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/stocks/popular")
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    return cpu / requests, wall / requests, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--cards", type=int, default=5)
+    parser.add_argument("--points", type=int, default=30)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = {}
+    for label, fast_json in (("pydantic", False), ("orjson", True)):
+        app = build_app(fast_json, args.cards, args.points)
+        results[label] = asyncio.run(measure(app, args.requests))
+
+    print(f"/stocks/popular, {args.cards} cards x {args.points} points, {args.requests} requests")
+    for label, (cpu, wall, size) in results.items():
+        print(f"{label:>9}: {cpu * 1e6:8.1f} us CPU/request, {wall * 1e6:8.1f} us wall/request, {size} bytes")
+    base, fast = results["pydantic"][0], results["orjson"][0]
+    print(f"CPU per request reduced by {(1 - fast / base) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Synthetic company/stockprice/news data for benchmarks, loaded with COPY.
+
+Scale presets go from today's production size up to 5k tickers / 50M bars. Data is
+deterministic for a given --seed, so runs against the same preset are comparable.
+Tickers are SYN0001, SYN0002, ...; bars are business days ending today.
+
+    python -m benchmarks.synthetic_market --scale current --truncate
+    python -m benchmarks.synthetic_market --companies 300 --bars 1000 --news 20
+
+Uses DATABASE_URL (the +asyncpg driver suffix is stripped). The schema must already
+be migrated (alembic upgrade head).
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import asyncpg
+
+# companies, bars per company, news per company
+SCALES = {
+    "current": (78, 282, 30),        # ~22k bars, как в проде сейчас
+    "medium": (500, 2_500, 50),      # 1.25M
+    "large": (2_000, 5_000, 50),     # 10M
+    "xl": (5_000, 10_000, 50),       # 50M
+}
+
+SECTORS = ["Technology", "Financial Services", "Energy", "Healthcare", "Industrials", "Utilities", "Consumer Cyclical"]
+HEADLINE_TEMPLATES = [
+    "{ticker} reports quarterly results above expectations",
+    "{ticker} announces dividend payment",
+    "{ticker} shares fall after guidance cut",
+    "{ticker} signs new supply agreement",
+    "Analysts upgrade {ticker} to buy",
+]
+
+
+def to_asyncpg_dsn(url: str) -> str:
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def business_days(count: int, end: date) -> list[date]:
+    days = []
+    current = end
+    while len(days) < count:
+        if current.weekday() < 5:
+            days.append(current)
+        current -= timedelta(days=1)
+    days.reverse()
+    return days
+
+
+def company_records(companies: int, rng: random.Random):
+    for i in range(1, companies + 1):
+        ticker = f"SYN{i:04d}"
+        yield (
+            ticker,
+            f"Synthetic {i}",
+            f"Synthetic Company {i} JSC",
+            "Synthetic",
+            rng.choice(SECTORS),
+            "Kazakhstan",
+            False,
+        )
+
+
+def price_records(company_ids: dict[str, int], days: list[date], rng: random.Random, progress):
+    """Geometric random walk per ticker."""
+    for ticker, company_id in company_ids.items():
+        close = rng.uniform(5, 500)
+        volatility = rng.uniform(0.005, 0.04)
+        base_volume = rng.randint(10_000, 5_000_000)
+        for day in days:
+            open_ = close
+            close = max(0.01, open_ * math.exp(rng.gauss(0, volatility)))
+            high = max(open_, close) * (1 + abs(rng.gauss(0, volatility / 2)))
+            low = min(open_, close) * (1 - abs(rng.gauss(0, volatility / 2)))
+            volume = int(base_volume * rng.uniform(0.3, 3.0))
+            yield (company_id, ticker, day, round(open_, 4), round(high, 4), round(low, 4), round(close, 4), volume, False)
+        progress(len(days))
+
+
+def news_records(tickers: list[str], per_company: int, end: date, span_days: int, rng: random.Random):
+    end_dt = datetime.combine(end, datetime.min.time())
+    for ticker in tickers:
+        for _ in range(per_company):
+            positive = rng.random()
+            negative = rng.random() * (1 - positive)
+            yield (
+                ticker,
+                end_dt - timedelta(minutes=rng.randint(0, span_days * 24 * 60)),
+                rng.choice(HEADLINE_TEMPLATES).format(ticker=ticker),
+                "Synthetic news body.",
+                round(1 - positive - negative, 4),
+                round(positive, 4),
+                round(negative, 4),
+                "synthetic",
+                rng.random() < 0.1,
+                False,
+            )
+
+
+class Progress:
+    def __init__(self, total: int, label: str):
+        self.total, self.label, self.done = total, label, 0
+        self.started = self.last_report = time.perf_counter()
+
+    def __call__(self, rows: int):
+        self.done += rows
+        now = time.perf_counter()
+        if now - self.last_report >= 5 or self.done >= self.total:
+            self.last_report = now
+            rate = self.done / max(now - self.started, 1e-9)
+            print(f"   {self.label}: {self.done:,}/{self.total:,} ({rate:,.0f} rows/s)")
+
+
+async def generate(args):
+    companies, bars, news = SCALES[args.scale] if args.scale else (0, 0, 0)
+    companies = args.companies or companies
+    bars = args.bars or bars
+    news = args.news if args.news is not None else news
+    rng = random.Random(args.seed)
+    today = date.today()
+    days = business_days(bars, today)
+
+    conn = await asyncpg.connect(to_asyncpg_dsn(args.database_url))
+    try:
+        if args.truncate:
+            await conn.execute("TRUNCATE stockprice, news, company RESTART IDENTITY CASCADE")
+            print("🧹 Tables truncated")
+
+        for year in range(days[0].year, today.year + 2):
+            await conn.execute("SELECT create_stockprice_partition($1)", year)
+
+        started = time.perf_counter()
+        await conn.copy_records_to_table(
+            "company",
+            records=company_records(companies, rng),
+            columns=["ticker", "shortname", "longname", "industry", "sector", "country", "is_deleted"],
+        )
+        rows = await conn.fetch("SELECT id, ticker FROM company WHERE ticker LIKE 'SYN%' ORDER BY id")
+        company_ids = {row["ticker"]: row["id"] for row in rows}
+        print(f"✅ {len(company_ids)} companies")
+
+        await conn.copy_records_to_table(
+            "stockprice",
+            records=price_records(company_ids, days, rng, Progress(len(company_ids) * len(days), "stockprice")),
+            columns=["company_id", "ticker", "date", "open", "high", "low", "close", "volume", "is_deleted"],
+        )
+        print(f"✅ {len(company_ids) * len(days):,} bars")
+        await conn.execute(
+            "SELECT refresh_stockprice_rollups($1::int[], $2, $3)", list(company_ids.values()), days[0], days[-1]
+        )
+        print("✅ weekly/monthly rollups")
+
+        if news:
+            await conn.copy_records_to_table(
+                "news",
+                records=news_records(list(company_ids), news, today, min(bars, 365), rng),
+                columns=["ticker", "date", "title", "content", "neutral", "positive", "negative", "source", "important", "is_deleted"],
+            )
+            print(f"✅ {len(company_ids) * news:,} news")
+
+        await conn.execute("ANALYZE company")
+        await conn.execute("ANALYZE stockprice")
+        await conn.execute("ANALYZE stockprice_weekly")
+        await conn.execute("ANALYZE stockprice_monthly")
+        await conn.execute("ANALYZE news")
+        print(f"⏱️ Done in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="current")
+    parser.add_argument("--companies", type=int, help="overrides the preset")
+    parser.add_argument("--bars", type=int, help="bars per company, overrides the preset")
+    parser.add_argument("--news", type=int, help="news per company, overrides the preset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="clear company/stockprice/news first")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("DATABASE_URL is not set")
+    asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    main()
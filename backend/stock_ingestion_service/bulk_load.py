@@ -0,0 +1,230 @@
+"""Streaming CSV loader for stockprice and company dumps.
+
+The CSV is read in chunks of --chunk-rows records, so memory stays constant whatever
+the file size. Each chunk is COPYed into a temp staging table and upserted into the
+target in one transaction (stockprice by primary key, company by ticker); for stockprice
+the weekly/monthly rollups of the touched periods are refreshed in that transaction too.
+The staging table is dropped on commit and the statement cache is off, so the loader
+also works through PgBouncer in transaction mode. After each commit the number of loaded
+records goes into <csv>.checkpoint.json; a rerun after a failure continues from there.
+Re-applying a chunk is harmless because of the upsert. --restart ignores the checkpoint.
+
+    python bulk_load.py stockprice stockprice.csv
+    python bulk_load.py company company.csv --chunk-rows 5000
+
+Column order is the one of the existing dumps (see TABLES). Connection: --database-url or
+DATABASE_URL; the +asyncpg suffix is accepted.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import time
+
+import asyncpg
+
+TABLES = {
+    "stockprice": {
+        "columns": [
+            "date", "open", "high", "low", "close", "volume", "company_id", "id",
+            "created_at", "updated_at", "is_deleted",
+        ],
+        "conflict": ["id", "date"],
+        "partitioned": True,
+        "rollups": True,
+    },
+    "company": {
+        "columns": [
+            "ticker", "shortname", "longname", "industry", "sector", "country",
+            "city", "address", "website", "image_url", "summary", "id",
+            "created_at", "updated_at", "is_deleted",
+        ],
+        # ticker уникален: строка с новым id и существующим тикером обновляет компанию,
+        # id существующей компании не меняется — на него ссылаются цены
+        "conflict": ["ticker"],
+        "keep": ["id"],
+        "partitioned": False,
+        "rollups": False,
+    },
+}
+
+
+def to_asyncpg_dsn(url: str) -> str:
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+class Checkpoint:
+    """Rows already committed for a given CSV; reset if the file changed since."""
+
+    def __init__(self, csv_path: str, table: str):
+        self.path = f"{csv_path}.checkpoint.json"
+        stat = os.stat(csv_path)
+        self.fingerprint = {"table": table, "size": stat.st_size, "mtime": int(stat.st_mtime)}
+        self.rows_done = 0
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f)
+        if all(data.get(key) == value for key, value in self.fingerprint.items()):
+            self.rows_done = data["rows_done"]
+        else:
+            print(f"⚠️ {self.path} belongs to another file version, starting from scratch")
+
+    def save(self, rows_done: int):
+        self.rows_done = rows_done
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({**self.fingerprint, "rows_done": rows_done}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RawLines:
+    """Line iterator over a binary file that keeps the raw bytes of the current record."""
+
+    def __init__(self, f):
+        self.f = f
+        self.position = 0
+        self.pending: list[bytes] = []
+
+    def __iter__(self):
+        for line in self.f:
+            self.position += len(line)
+            self.pending.append(line)
+            yield line.decode("utf-8")
+
+    def take(self) -> bytes:
+        raw, self.pending = b"".join(self.pending), []
+        return raw
+
+
+def read_chunks(csv_path: str, chunk_rows: int, skip_rows: int, header: bool):
+    """Yields (csv bytes, record count, bytes read so far) without holding more than one chunk.
+
+    csv.reader is only used to find record boundaries (quoted fields may span lines);
+    the original bytes go to COPY untouched, so "" and NULL stay distinct.
+    """
+    with open(csv_path, "rb") as f:
+        lines = RawLines(f)
+        reader = csv.reader(iter(lines))
+        if header:
+            next(reader, None)
+        for _ in range(skip_rows):
+            if next(reader, None) is None:
+                return
+        lines.take()
+        while True:
+            buffer = io.BytesIO()
+            count = 0
+            for _ in reader:
+                buffer.write(lines.take())
+                count += 1
+                if count >= chunk_rows:
+                    break
+            if not count:
+                return
+            yield buffer.getvalue(), count, lines.position
+
+
+def build_upsert(table: str, spec: dict) -> str:
+    columns = spec["columns"]
+    updates = [c for c in columns if c not in spec["conflict"] and c not in spec.get("keep", [])]
+    if table == "stockprice":
+        # в дампе нет ticker, берём его из company
+        select = ", ".join(f"s.{c}" for c in columns) + ", c.ticker"
+        insert_columns = ", ".join(columns) + ", ticker"
+        source = "staging s LEFT JOIN company c ON c.id = s.company_id"
+        updates.append("ticker")
+    else:
+        select = ", ".join(f"s.{c}" for c in columns)
+        insert_columns = ", ".join(columns)
+        # один и тот же ключ дважды в чанке ON CONFLICT DO UPDATE не переживёт, берём последнюю строку
+        conflict = ", ".join(spec["conflict"])
+        source = f"(SELECT DISTINCT ON ({conflict}) * FROM staging ORDER BY {conflict}, id DESC) s"
+    return (
+        f"INSERT INTO {table} ({insert_columns}) SELECT {select} FROM {source} "
+        f"ON CONFLICT ({', '.join(spec['conflict'])}) DO UPDATE SET "
+        + ", ".join(f"{c} = EXCLUDED.{c}" for c in updates)
+    )
+
+
+async def load(args):
+    spec = TABLES[args.table]
+    checkpoint = Checkpoint(args.csv, args.table)
+    if args.restart:
+        checkpoint.clear()
+    else:
+        checkpoint.load()
+    if checkpoint.rows_done:
+        print(f"↩️ Resuming after {checkpoint.rows_done:,} rows")
+
+    total_bytes = os.path.getsize(args.csv)
+    upsert = build_upsert(args.table, spec)
+    # statement_cache_size=0 и staging в пределах транзакции: за PgBouncer в режиме transaction
+    # серверное соединение меняется между транзакциями, сессионные объекты на нём не живут
+    conn = await asyncpg.connect(to_asyncpg_dsn(args.database_url), statement_cache_size=0)
+    try:
+        rows_done = checkpoint.rows_done
+        started = time.perf_counter()
+        loaded = 0
+        for data, count, position in read_chunks(args.csv, args.chunk_rows, rows_done, args.header):
+            async with conn.transaction():
+                await conn.execute(
+                    f"CREATE TEMP TABLE staging (LIKE {args.table} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                await conn.copy_to_table(
+                    "staging", source=io.BytesIO(data), columns=spec["columns"], format="csv"
+                )
+                if spec["partitioned"]:
+                    await conn.execute(
+                        "SELECT create_stockprice_partition(y) "
+                        "FROM (SELECT DISTINCT extract(year FROM date)::int AS y FROM staging) years"
+                    )
+                await conn.execute(upsert)
+                if spec["rollups"]:
+                    # недели/месяцы, которых коснулся чанк, пересчитываются в той же транзакции, окно — по каждой компании
+                    await conn.execute(
+                        "SELECT refresh_stockprice_rollups(ARRAY[company_id], min(date), max(date)) "
+                        "FROM staging WHERE company_id IS NOT NULL GROUP BY company_id ORDER BY company_id"
+                    )
+            rows_done += count
+            loaded += count
+            checkpoint.save(rows_done)
+            rate = loaded / max(time.perf_counter() - started, 1e-9)
+            print(f"   {rows_done:,} rows ({position / total_bytes:.0%}), {rate:,.0f} rows/s")
+
+        # id приходили из файла, сдвигаем sequence, чтобы новые вставки не конфликтовали
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{args.table}', 'id'), "
+            f"(SELECT coalesce(max(id), 1) FROM {args.table}))"
+        )
+        await conn.execute(f"ANALYZE {args.table}")
+        checkpoint.clear()
+        print(f"✅ {args.table}: {rows_done:,} rows loaded in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table", choices=TABLES)
+    parser.add_argument("csv")
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--header", action="store_true", help="the CSV has a header line")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("DATABASE_URL is not set")
+    asyncio.run(load(args))
+
+
+if __name__ == "__main__":
+    main()